@@ -17,6 +17,9 @@ class ModuleContext:
 
 import fnmatch
 import difflib
+from itertools import islice
+import queue
+import threading
 
 
 class BaseModule:
@@ -62,14 +65,67 @@ class BaseModule:
                 if f.is_file() and match_patterns(f):
                     yield f
 
+    def _iter_markdown_texts(self, path: str | Path, config: Dict[str, Any], prefetch: int = 8):
+        """按 _iter_markdown_files 的顺序产出 (文件, 文本)。
+
+        处理多个文件时由后台线程预读后续文件（最多缓冲 prefetch 个），
+        磁盘读取与当前文件的处理重叠；读取异常在轮到该文件时于调用方抛出。
+        """
+        if Path(path).is_file():
+            for file in self._iter_markdown_files(path, config):
+                yield file, file.read_text(encoding="utf-8")
+            return
+        q: queue.Queue = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+        done = object()
+
+        def put(item) -> bool:
+            # 调用方提前结束时不再阻塞在已满的队列上
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def reader():
+            try:
+                for file in self._iter_markdown_files(path, config):
+                    try:
+                        item = (file, file.read_text(encoding="utf-8"), None)
+                    except Exception as e:
+                        item = (file, None, e)
+                    if not put(item):
+                        return
+            except Exception as e:
+                put((None, None, e))
+            put(done)
+
+        thread = threading.Thread(target=reader, name=f"{self.name}-reader", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = q.get()
+                if item is done:
+                    return
+                file, text, error = item
+                if error is not None:
+                    raise error
+                yield file, text
+        finally:
+            stop.set()
+            thread.join()
+
     def _maybe_write(self, file: Path, original: str, new_text: str, dry_run: bool, diffs: list):
         if original == new_text:
             return False
         if dry_run:
-            diff_lines = list(difflib.unified_diff(
+            # unified_diff 按需逐行产出，只取保留的前 5000 行，不生成被截断的部分
+            diff_lines = list(islice(difflib.unified_diff(
                 original.splitlines(True), new_text.splitlines(True),
-                fromfile=str(file), tofile=str(file)))
-            diffs.append({"file": str(file), "diff": diff_lines[:5000]})  # 防止超大
+                fromfile=str(file), tofile=str(file)), 5000))
+            diffs.append({"file": str(file), "diff": diff_lines})  # 防止超大
             return True
         file.write_text(new_text, encoding="utf-8")
         return True
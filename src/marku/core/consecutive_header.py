@@ -9,6 +9,10 @@ import re
 from .base import BaseModule, ModuleContext
 from .plugins import hookimpl
 
+# 标题行与标题标记（# 串及其后的空白），模块加载时编译一次
+_HEADER_RE = re.compile(r'^(#+)\s+(.*)$')
+_HEADER_MARK_RE = re.compile(r'^#+\s*')
+
 
 @dataclass
 class _Header:
@@ -34,8 +38,7 @@ class ConsecutiveHeaderModule(BaseModule):
         changed = 0
         verbose = config.get("verbose", True)
         details: list = []
-        for file in self._iter_markdown_files(input_path, config):
-            text = file.read_text(encoding="utf-8")
+        for file, text in self._iter_markdown_texts(input_path, config):
             lines = text.splitlines(keepends=True)
             new_lines = self._process(lines, min_consecutive, max_blank, levels, mode)
             modified = self._maybe_write(file, text, "".join(new_lines), dry_run, diffs)
@@ -60,7 +63,7 @@ def run(context: ModuleContext, config: Dict[str, Any]):
         s = line.strip()
         if not s.startswith('#'):
             return None
-        m = re.match(r'^(#+)\s+(.*)$', s)
+        m = _HEADER_RE.match(s)
         if not m:
             return None
         level = len(m.group(1))
@@ -77,7 +80,7 @@ def run(context: ModuleContext, config: Dict[str, Any]):
                 start = 1 if mode == 1 else 0
                 for h in current[start:]:
                     # remove leading hashes + spaces
-                    out[h.index] = re.sub(r'^#+\s*', '', out[h.index])
+                    out[h.index] = _HEADER_MARK_RE.sub('', out[h.index])
             current.clear()
 
         for i, line in enumerate(lines):
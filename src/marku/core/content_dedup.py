@@ -8,13 +8,17 @@ from pathlib import Path
 from .base import BaseModule, ModuleContext
 from .plugins import hookimpl
 
+# 标题行与图片链接，模块加载时编译一次，不再每行 / 每个文件经 re 模块缓存查找
+_TITLE_RE = re.compile(r'^(#{1,6})\s+(.+)$')
+_IMG_RE = re.compile(r'!\[(.*?)\]\((.*?)\)')
+
 
 def _dedup_titles(content: str, levels: List[int]):
     levels_set = set(levels)
     seen: Dict[int, set] = {}
     out_lines = []
     for line in content.split('\n'):
-        m = re.match(r'^(#{1,6})\s+(.+)$', line)
+        m = _TITLE_RE.match(line)
         if m:
             lvl = len(m.group(1))
             if lvl in levels_set:
@@ -28,7 +32,6 @@ def _dedup_titles(content: str, levels: List[int]):
 
 
 def _dedup_images(content: str):
-    pattern = r'!\[(.*?)\]\((.*?)\)'
     seen = set()
     def repl(match):
         url = match.group(2)
@@ -36,7 +39,7 @@ def _dedup_images(content: str):
             return ''
         seen.add(url)
         return match.group(0)
-    return re.sub(pattern, repl, content)
+    return _IMG_RE.sub(repl, content)
 
 
 class ContentDedupModule(BaseModule):
@@ -54,9 +57,8 @@ class ContentDedupModule(BaseModule):
         diffs: list = []
         verbose = config.get("verbose", True)
         details: list = []
-        for file in self._iter_markdown_files(input_path, config):
+        for file, text in self._iter_markdown_texts(input_path, config):
             total += 1
-            text = file.read_text(encoding="utf-8")
             orig = text
             if do_titles:
                 text = _dedup_titles(text, title_levels)
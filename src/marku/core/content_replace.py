@@ -16,11 +16,11 @@ import re
 
 from .base import BaseModule, ModuleContext
 from .plugins import hookimpl
+# 规则触发子串表与标点合并函数与脚本版规则定义在一处，此处直接复用
+from ..scripts.contents_replacer import PUNCTUATION_TRIGGERS, RULE_TRIGGERS, merge_patterns
 
-BASE_PATTERNS: List[tuple[str,str]] = [
-    (r'^ ',''),
-    (r'(?:\r?\n){3,}', '\n\n'),
-    (r'^.*?目\s{0,10}录.*$\n?', ''),
+# 标点规则均为互不影响的字面量替换（输出不会成为其他规则的输入），编译时合并为一条
+PUNCTUATION_PATTERNS: List[tuple[str,str]] = [
     (r'\（', '('), (r'\）', ')'),
     (r'\「', '['), (r'\」', ']'),
     (r'\【', '['), (r'\】', ']'),
@@ -28,6 +28,13 @@ BASE_PATTERNS: List[tuple[str,str]] = [
     (r'\，', ', '), (r'\；', '; '), (r'\：', ': '),
     (r'\！', '!'), (r'\？', '?'),
     (r'""|"', '"'), (r"''|'", "'"),
+]
+
+BASE_PATTERNS: List[tuple[str,str]] = [
+    (r'^ ',''),
+    (r'(?:\r?\n){3,}', '\n\n'),
+    (r'^.*?目\s{0,10}录.*$\n?', ''),
+    *PUNCTUATION_PATTERNS,
     (r'([^|])\n\|(.*?\|.*?\|.*?\n)', r'\1\n\n|\2'),
     (r'\|\n([^|])', r'|\n\n\1'),
     (r':(-{1,1000}):', r'\1'),
@@ -38,10 +45,34 @@ BASE_PATTERNS: List[tuple[str,str]] = [
     (r'^\[([\u4e00-\u9fa5A-Za-z0-9]+)\]', r'`[\1]`'),
 ]
 
-def _apply_patterns(text: str, patterns: List[tuple[str,str]]):
+# 预编译基础规则，避免每个文件重复编译；标点规则合并为一条，其余规则与顺序相关，保持逐条执行
+_COMPILED_BASE: List[tuple[re.Pattern, Any]] = []
+# 预编译规则 -> 触发子串，未登记的规则（含用户规则）总是执行
+_COMPILED_TRIGGERS: Dict[re.Pattern, tuple[str, ...]] = {}
+for _p, _r in BASE_PATTERNS:
+    if (_p, _r) in PUNCTUATION_PATTERNS:
+        if (_p, _r) == PUNCTUATION_PATTERNS[0]:
+            _COMPILED_BASE.append(merge_patterns(PUNCTUATION_PATTERNS))
+            _COMPILED_TRIGGERS[_COMPILED_BASE[-1][0]] = PUNCTUATION_TRIGGERS
+            _PUNCTUATION_RE = _COMPILED_BASE[-1][0]
+        continue
+    _COMPILED_BASE.append((re.compile(_p, re.MULTILINE), _r))
+    if _p in RULE_TRIGGERS:
+        _COMPILED_TRIGGERS[_COMPILED_BASE[-1][0]] = RULE_TRIGGERS[_p]
+del _p, _r
+
+def _apply_patterns(text: str, patterns: List[tuple[re.Pattern | str, str]]):
     for pat, repl in patterns:
-        text_new = re.sub(pat, repl, text, flags=re.MULTILINE)
-        text = text_new
+        if isinstance(pat, str):
+            pat = re.compile(pat, re.MULTILINE)
+        triggers = _COMPILED_TRIGGERS.get(pat)
+        if triggers and not any(t in text for t in triggers):
+            continue
+        if pat is _PUNCTUATION_RE and text.isascii():
+            # 纯 ASCII 文本中没有全角标点，标点规则只剩成对引号折叠为单个，两次 replace 即可
+            text = text.replace('""', '"').replace("''", "'")
+            continue
+        text = pat.sub(repl, text)
     return text
 
 class ContentReplaceModule(BaseModule):
@@ -54,11 +85,11 @@ class ContentReplaceModule(BaseModule):
         diffs: list = []
         details: list = []
         user_patterns = config.get('patterns') or []
-        patterns: List[tuple[str,str]] = BASE_PATTERNS + [tuple(p) for p in user_patterns if isinstance(p, (list,tuple)) and len(p)==2]
+        patterns: List[tuple[re.Pattern | str, str]] = _COMPILED_BASE + [
+            (re.compile(p[0], re.MULTILINE), p[1]) for p in user_patterns if isinstance(p, (list,tuple)) and len(p)==2]
         total=0; changed=0
-        for file in self._iter_markdown_files(input_path, config):
+        for file, orig in self._iter_markdown_texts(input_path, config):
             total+=1
-            orig = file.read_text(encoding='utf-8')
             new = _apply_patterns(orig, patterns)
             modified = self._maybe_write(file, orig, new, dry_run, diffs)
             if modified: changed+=1
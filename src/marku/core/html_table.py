@@ -10,37 +10,54 @@ from .base import BaseModule, ModuleContext
 from .plugins import hookimpl
 
 
+# 解析器可复用，避免每个表格重新创建
+# huge_tree 取消超长文本节点的解析上限；注释与处理指令不参与文本提取，解析时直接丢弃；
+# 不需要按 id 查找元素，关闭 id 表；禁止网络访问
+_HTML_PARSER = etree.HTMLParser(recover=True, remove_blank_text=False, huge_tree=True,
+                                remove_comments=True, remove_pis=True, collect_ids=False,
+                                no_network=True)
+_XP_TR = etree.XPath('//tr')
+_XP_CELLS = etree.XPath('./th|./td')
+# string() 由 libxml2 一次拼接全部后代文本，省去 itertext 逐节点产出再 join
+_XP_TEXT = etree.XPath('string()', smart_strings=False)
+_TABLE_RE = re.compile(r'<table.*?>.*?</table>', re.DOTALL)
+
+
 def _convert_table(html_table: str) -> str:
-    parser = etree.HTMLParser()
     try:
-        root = etree.fromstring(html_table, parser)
+        root = etree.fromstring(html_table, _HTML_PARSER)
     except etree.XMLSyntaxError:
         return html_table  # 保持原样
-    rows = root.xpath('//tr')
+    rows = _XP_TR(root)
     if not rows:
         return html_table
     # 计算列数
-    col_num = sum(int(td.get('colspan', 1)) for td in rows[0].xpath('./th|./td'))
+    col_num = sum(int(td.get('colspan', 1)) for td in _XP_CELLS(rows[0]))
     row_num = len(rows)
     data = [['' for _ in range(col_num)] for _ in range(row_num)]
     empty_tag = '{: class=\'fn__none\'}'
     for r, tr in enumerate(rows):
         c = 0
-        for td in tr.xpath('./th|./td'):
+        for td in _XP_CELLS(tr):
             while c < col_num and data[r][c] == empty_tag:
                 c += 1
             rs = int(td.get('rowspan', 1))
             cs = int(td.get('colspan', 1))
-            content = ''.join(td.itertext()).replace('\n', '<br />')
-            for i in range(rs):
-                for j in range(cs):
-                    if r + i < row_num and c + j < col_num:
-                        data[r + i][c + j] = empty_tag
+            content = _XP_TEXT(td)
+            if '\n' in content:
+                content = content.replace('\n', '<br />')
+            # 被合并覆盖的单元格按行做切片赋值，代替逐格写入
+            width = min(c + cs, col_num) - c
+            if c >= 0 and width > 0:
+                fill = [empty_tag] * width
+                for i in range(r, min(r + rs, row_num)):
+                    data[i][c:c + width] = fill
             data[r][c] = (f"{{: colspan='{cs}' rowspan='{rs}'}}" + content) if (rs > 1 or cs > 1) else content
             c += cs
     out_lines = []
     for r, row in enumerate(data):
-        out_lines.append('|' + ' '.join(cell + ' |' for cell in row))
+        # 一次 join 拼出整行，不再为每个单元格生成 "cell |" 中间串
+        out_lines.append('|' + ' | '.join(row) + ' |' if row else '|')
         if r == 0:
             out_lines.append('|' + (' --- |' * col_num))
     return '\n'.join(out_lines) + '\n'
@@ -57,11 +74,10 @@ class HtmlTableModule(BaseModule):
         diffs: list = []
         verbose = config.get("verbose", True)
         details: list = []
-        for file in self._iter_markdown_files(input_path, config):
+        for file, orig_text in self._iter_markdown_texts(input_path, config):
             files += 1
-            orig_text = file.read_text(encoding="utf-8")
             text = orig_text.replace('</body></html>', '').replace('<html><body>', '')
-            tables = re.findall(r'<table.*?>.*?</table>', text, re.DOTALL)
+            tables = _TABLE_RE.findall(text)
             changed_here = False
             if tables:
                 for t in tables:
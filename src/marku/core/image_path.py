@@ -19,21 +19,21 @@ class ImagePathModule(BaseModule):
             print("[image_path_replacer] base_url 为空，跳过")
             return
         esc = re.escape(pattern)
-        rx = re.compile(fr'!\[(.*?)\]\(({esc}[^)]+)\)')
+        rx = re.compile(fr'!\[(.*?)\]\({esc}([^)]+)\)')
+        # 匹配必然包含该子串，不含时跳过正则扫描
+        needle = '](' + pattern
+        # 模板替换由 re 引擎直接展开，无需逐个匹配回调；模板中仅反斜杠需转义
+        repl = r'![\g<1>](' + base_url.replace('\\', '\\\\') + r'\g<2>)'
+
         changed = 0
         total = 0
         dry_run = context.shared.get("__dry_run", False)
         diffs: list = []
         verbose = config.get("verbose", True)
         details: list = []
-        for file in self._iter_markdown_files(input_path, config):
+        for file, text in self._iter_markdown_texts(input_path, config):
             total += 1
-            text = file.read_text(encoding="utf-8")
-            def repl(m):
-                rel = m.group(2)
-                suffix = rel[len(pattern):]
-                return f"![{m.group(1)}]({base_url}{suffix})"
-            new_text = rx.sub(repl, text)
+            new_text = rx.sub(repl, text) if needle in text else text
             modified = self._maybe_write(file, text, new_text, dry_run, diffs)
             if modified:
                 changed += 1
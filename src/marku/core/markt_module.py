@@ -123,9 +123,8 @@ class MarktModule(BaseModule):
         files_count = 0
         changed_count = 0
 
-        for file in self._iter_markdown_files(input_path, config):
+        for file, orig_text in self._iter_markdown_texts(input_path, config):
             files_count += 1
-            orig_text = file.read_text(encoding="utf-8")
 
             if mode == "h2l":
                 new_text = headings_to_list(
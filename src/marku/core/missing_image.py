@@ -10,6 +10,10 @@ from .base import BaseModule, ModuleContext
 from .plugins import hookimpl
 
 
+# 模块级预编译，多次运行 / 多个模块实例之间共享
+_IMG_RE = re.compile(r'!\[(.*?)\]\(([^)]+)\)')
+
+
 class MissingImageModule(BaseModule):
     name = "missing_image_remover"
 
@@ -45,7 +49,6 @@ class MissingImageModule(BaseModule):
         check_file_uri = config.get("check_file_uri", True)
         check_relative = config.get("check_relative", False)
         
-        pattern = re.compile(r'!\[(.*?)\]\(([^)]+)\)')
         changed = 0
         total = 0
         dry_run = context.shared.get("__dry_run", False)
@@ -53,9 +56,8 @@ class MissingImageModule(BaseModule):
         verbose = config.get("verbose", True)
         details: list = []
         
-        for file in self._iter_markdown_files(input_path, config):
+        for file, text in self._iter_markdown_texts(input_path, config):
             total += 1
-            text = file.read_text(encoding="utf-8")
             base_dir = str(file.parent)
             
             removed_count = 0
@@ -70,7 +72,8 @@ class MissingImageModule(BaseModule):
                 
                 return match.group(0)
                 
-            new_text = pattern.sub(replacer, text)
+            # 图片链接必然包含 "!["，不含时省去整篇正则扫描
+            new_text = _IMG_RE.sub(replacer, text) if '![' in text else text
             modified = self._maybe_write(file, text, new_text, dry_run, diffs)
             
             if modified:
@@ -8,27 +8,22 @@ from .base import BaseModule, ModuleContext
 from .plugins import hookimpl
 
 
+_ITEM_RE = re.compile(r'^\s*\d+\.\s')
+_MARK_RE = re.compile(r'(\d+)\.\s')
+
+
 def _process(content: str) -> str:
     lines = content.split('\n')
-    rx = re.compile(r'^\s*\d+\.\s')
-    flags = [bool(rx.match(l)) for l in lines]
-    out = lines[:]
-    for i, is_item in enumerate(flags):
-        if not is_item:
-            continue
-        isolated = True
-        for j in range(max(0, i-3), i):
-            if flags[j]:
-                isolated = False
-                break
-        if isolated:
-            for j in range(i+1, min(i+4, len(lines))):
-                if flags[j]:
-                    isolated = False
-                    break
-        if isolated:
-            out[i] = re.sub(r'(\d+)\.\s', r'\1.', out[i], count=1)
-    return '\n'.join(out)
+    # 有序列表项行号（升序）；孤立 = 与前后相邻列表项的行距都大于 3
+    match = _ITEM_RE.match
+    items = [i for i, l in enumerate(lines) if match(l)]
+    prev = -4
+    for k, i in enumerate(items):
+        nxt = items[k + 1] if k + 1 < len(items) else i + 4
+        if i - prev > 3 and nxt - i > 3:
+            lines[i] = _MARK_RE.sub(r'\1.', lines[i], count=1)
+        prev = i
+    return '\n'.join(lines)
 
 
 class SingleOrderListModule(BaseModule):
@@ -42,9 +37,8 @@ class SingleOrderListModule(BaseModule):
         diffs: list = []
         verbose = config.get("verbose", True)
         details: list = []
-        for file in self._iter_markdown_files(input_path, config):
+        for file, text in self._iter_markdown_texts(input_path, config):
             total += 1
-            text = file.read_text(encoding="utf-8")
             new_text = _process(text)
             modified = self._maybe_write(file, text, new_text, dry_run, diffs)
             if modified:
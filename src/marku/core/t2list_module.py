@@ -8,6 +8,13 @@ from .base import BaseModule, ModuleContext
 from .plugins import hookimpl
 
 
+# 标题 / 列表合并为一个模式，每行一次匹配：标题分支优先，匹配时第 1、2 组有值
+_LINE_RE = re.compile(r'(#{1,6})\s+(.+)$|\s*(?:\d+\.|\*|-)\s+.+$')
+_INDENTS = tuple('    ' * i for i in range(7))
+# 重置下级计数器时按切片整体赋值，代替逐项循环
+_ZEROS = (0,) * 6
+
+
 def _convert(text: str) -> str:
     lines = text.splitlines()
     counters = [0]*6
@@ -15,14 +22,13 @@ def _convert(text: str) -> str:
     result = []
     current_indent = 0
     content_indent = 0
-    list_block: list[str] = []
     in_list = False
     for line in lines:
-        h = re.match(r'^(#{1,6})\s+(.+)$', line)
-        lm = re.match(r'^(\s*)(?:\d+\.|\*|-)\s+.+$', line)
+        m = _LINE_RE.match(line)
+        h = m if m and m.group(1) else None
+        lm = m is not None and h is None
         if h:
-            if list_block:
-                result.extend(list_block); list_block=[]; in_list=False
+            in_list = False
             lvl = len(h.group(1))
             while stack and stack[-1] >= lvl:
                 stack.pop()
@@ -30,25 +36,25 @@ def _convert(text: str) -> str:
             current_indent = len(stack)-1
             content_indent = current_indent+1
             counters[current_indent]+=1
-            for i in range(current_indent+1,6): counters[i]=0
-            indent = '    '*current_indent
+            counters[current_indent+1:] = _ZEROS[current_indent+1:]
+            indent = _INDENTS[current_indent]
             number = f"{counters[current_indent]}."
             content = h.group(2)
             if '**' not in content:
                 content = f"**{content}**"
             result.append(f"{indent}{number} {content}")
         elif lm or (in_list and line.strip() and line.startswith('    ')):
-            if not in_list:
-                in_list=True; list_block=[]
-            base = '    '*content_indent
-            extra = ' '*(len(line)-len(line.lstrip()))
-            list_block.append(base+extra+line.lstrip())
+            # 列表行按顺序直接写入结果，无需先缓存为列表块
+            in_list = True
+            stripped = line.lstrip()
+            width = len(line) - len(stripped)
+            if line.count(' ', 0, width) == width:
+                result.append(_INDENTS[content_indent] + line)
+            else:
+                result.append(_INDENTS[content_indent] + ' ' * width + stripped)
         else:
-            if list_block:
-                result.extend(list_block); list_block=[]; in_list=False
-            result.append(('    '*content_indent)+line if line.strip() else line)
-    if list_block:
-        result.extend(list_block)
+            in_list = False
+            result.append(_INDENTS[content_indent] + line if line.strip() else line)
     return '\n'.join(result)
 
 
@@ -61,9 +67,8 @@ class T2ListModule(BaseModule):
         diffs: list = []
         verbose = config.get("verbose", True)
         details: list = []
-        for file in self._iter_markdown_files(input_path, config):
+        for file, txt in self._iter_markdown_texts(input_path, config):
             total += 1
-            txt = file.read_text(encoding='utf-8')
             new = _convert(txt)
             modified = self._maybe_write(file, txt, new, dry_run, diffs)
             if modified:
@@ -10,6 +10,7 @@
 """
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List
 import re
@@ -18,16 +19,21 @@ import cn2an
 from .base import BaseModule, ModuleContext
 from .plugins import hookimpl
 
+# 中文数字中的特殊字符，translate 一次完成映射
+_SPECIAL_NUM_TRANS = str.maketrans({'〇': '零', '两': '二'})
+
+@lru_cache(maxsize=2048)
+def _normalize_cn(chinese: str) -> str:
+    """中文数字经阿拉伯数字往返转换为标准写法；章节编号在各文件间大量重复，结果缓存"""
+    chinese = chinese.translate(_SPECIAL_NUM_TRANS)
+    return cn2an.an2cn(cn2an.cn2an(chinese, mode='smart'))
+
 def _convert_number(m, kind: str):
     if kind in ('number_title','number_subtitle'):
         num = m.group(1)
         return '##### ' + num + '. ' if kind=='number_title' else '###### ' + num + '. '
-    chinese = m.group(1)
-    special = {'〇':'零','两':'二'}
-    chinese = special.get(chinese, chinese)
     try:
-        arabic = cn2an.cn2an(chinese, mode='smart')
-        standard = cn2an.an2cn(arabic)
+        standard = _normalize_cn(m.group(1))
     except Exception:
         return m.group(0)
     mapping = {
@@ -46,6 +52,8 @@ PATTERNS = {
     5: [(re.compile(r'^(\d+)\.(?:\s*)', re.MULTILINE), lambda m: _convert_number(m,'number_title'))],
     6: [(re.compile(r'^(\d+\.\d+)\.(?:\s*)', re.MULTILINE), lambda m: _convert_number(m,'number_subtitle'))],
 }
+# 各级标题的每个匹配都必然包含的字符，文本中不含时跳过该级别的正则扫描
+_TRIGGERS = {1: '章', 2: '节', 3: '、', 4: '(', 5: '.', 6: '.'}
 
 class TitleNormalizeModule(BaseModule):
     name = "title_convert"
@@ -78,11 +86,12 @@ class TitleNormalizeModule(BaseModule):
         diffs: list = []
         details: list = []
         total=0; changed=0
-        for file in self._iter_markdown_files(input_path, config):
+        for file, orig in self._iter_markdown_texts(input_path, config):
             total+=1
-            orig = file.read_text(encoding='utf-8')
             new = orig
             for lv in levels:
+                if _TRIGGERS[lv] not in new:
+                    continue
                 for rx, repl in PATTERNS.get(lv, []):
                     new = rx.sub(repl, new)
             modified = self._maybe_write(file, orig, new, dry_run, diffs)
@@ -25,6 +25,9 @@ from rich.prompt import Prompt, Confirm, IntPrompt
 # logging 的基本配置现在在 main 函数中根据 verbose 参数设置
 console = Console()
 
+# 标题行开头的 # 串及其后的空白（降级为普通文本时移除）
+_HEADER_MARK_RE = re.compile(r'^#+\s*')
+
 class ConsecutiveHeaderProcessor:
     """
     处理 Markdown 文件中连续的同级标题。
@@ -116,6 +119,11 @@ class ConsecutiveHeaderProcessor:
 
             processed_lines = self._process_lines(lines)
 
+            # 原地处理且内容未变时不重写文件，保持修改时间不变
+            if processed_lines == lines and self.output_path == self.input_path:
+                logging.info(f"文件 {self.input_path} 未变更，跳过写入")
+                return True
+
             # 确保输出目录存在
             self.output_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -225,7 +233,7 @@ class ConsecutiveHeaderProcessor:
             for idx in range(start_index, len(headers_info)):
                 line_index, _, original_line = headers_info[idx]
                 # 移除 '#' 和紧随其后的空格
-                modified_line = re.sub(r'^#+\s*', '', original_line)
+                modified_line = _HEADER_MARK_RE.sub('', original_line)
                 lines[line_index] = modified_line
                 logging.info(f"  - 行 {line_index + 1}: 已将标题转换为普通文本。")
         elif headers_info:
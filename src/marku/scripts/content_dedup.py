@@ -3,24 +3,67 @@ import sys
 import os
 import argparse
 import json
+import tempfile
+import shutil
+import io
 from pathlib import Path
-from rich.console import Console
-from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
-from rich.table import Table
-from rich.prompt import Prompt, Confirm
-from rich.markdown import Markdown
-from rich import print as rprint
 
-console = Console()
+# rich 仅供交互式 CLI 使用，按需导入，Runner 等纯函数调用路径无需承担其启动开销
+_console = None
 
-def deduplicate_titles(content, title_levels=None):
+def _get_console():
+    """获取（首次调用时创建）rich 控制台"""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+# 统计信息中每类最多保留的重复项明细条数，防止超大输入导致内存无限增长
+_MAX_REPORTED = 1000
+# 全部标题级别
+_ALL_LEVELS = frozenset(range(1, 7))
+# 标题正则表达式（热路径使用 _parse_heading，此处保留作为语义参照）
+_TITLE_RE = re.compile(r'^(#{1,6})\s+(.+)$')
+# 以 # 开头的候选标题行（多行模式，一次扫描全文）
+_HASH_LINE_RE = re.compile(r'^#[^\n]*', re.M)
+# 图片链接正则表达式
+_IMG_RE = re.compile(r'!\[(.*?)\]\((.*?)\)')
+# 图片链接正则表达式（bytes 版本，供流式处理使用）
+_IMG_BYTES_RE = re.compile(rb'!\[(.*?)\]\((.*?)\)')
+# 文件读写缓冲区大小（1 MiB，减少大文件的系统调用次数）
+_STREAM_BUFFER = 1 << 20
+
+def _parse_heading(line):
+    """
+    手写的标题行扫描器，与 _TITLE_RE 语义一致但不经过正则引擎
+    
+    返回:
+        tuple|None: (标题级别, 标题文本)；标题文本未去除首尾空白，不是标题时返回None
+    """
+    n = 0
+    end = len(line)
+    # 与正则的 $ 一致：允许行尾带一个换行符
+    if end and line[end - 1] == '\n':
+        end -= 1
+    while n < 6 and n < end and line[n] == '#':
+        n += 1
+    # 至少一个 #，其后至少一个空白字符，且空白之后至少还有一个字符
+    if n == 0 or end - n < 2 or not line[n].isspace():
+        return None
+    text = line[n + 1:end]
+    if '\n' in text:
+        return None
+    return n, text
+
+def deduplicate_titles(content, title_levels=None, collect_stats=True):
     """
     对文本内容中的指定级别标题进行去重处理
     
     参数:
         content (str): 要处理的文本内容
         title_levels (list): 要处理的标题级别列表，例如 [1, 2, 3]，如果为None则处理所有级别(1-6)
+        collect_stats (bool): 是否收集去重统计，为False时统计信息返回None
     
     返回:
         tuple: (处理后的文本内容, 去重统计信息)
@@ -30,98 +73,259 @@ def deduplicate_titles(content, title_levels=None):
     
     # 转换为集合以便快速查找
     title_levels_set = set(title_levels)
-    
-    # 记录已经出现过的标题
-    seen_titles = {}
-    # 记录去重统计
-    stats = {level: {'total': 0, 'duplicated': 0, 'titles': []} for level in title_levels}
-    
-    lines = content.split('\n')
-    result_lines = []
-    
-    for line in lines:
-        # 使用正则表达式匹配所有级别的标题
-        match = re.match(r'^(#{1,6})\s+(.+)$', line)
+    # 默认处理全部 1-6 级时，_parse_heading 只会返回这些级别，可省去成员检查
+    all_levels = title_levels_set >= _ALL_LEVELS
+    
+    # 记录已经出现过的标题 (级别, 标准化标题)
+    seen_titles = set()
+    # 记录去重统计（每个请求的级别都有条目，未出现的级别计数为 0）
+    stats = {level: {'total': 0, 'duplicated': 0, 'titles': []} for level in title_levels} if collect_stats else None
+    
+    # 由正则引擎（C 实现）定位所有以 # 开头的行，非候选行不进入 Python 循环；
+    # 输出只拷贝被保留的区间
+    buf = io.StringIO()
+    pos = 0
+    drop_last_sep = False
+    
+    for m in _HASH_LINE_RE.finditer(content):
+        # 解析所有级别的标题
+        heading = _parse_heading(m.group())
+        if not heading:
+            continue
         
-        if match:
-            # 获取标题级别和内容
-            hashes, title_text = match.groups()
-            level = len(hashes)
-            
-            # 检查是否是需要处理的标题级别
-            if level in title_levels_set:
-                # 标准化标题文本（去除首尾空格并转换为小写）
-                normalized_title = title_text.strip().lower()
-                stats[level]['total'] += 1
-                
-                # 检查标题是否重复
-                if normalized_title in seen_titles.get(level, set()):
-                    # 标题重复，跳过
-                    stats[level]['duplicated'] += 1
+        # 获取标题级别和内容
+        level, title_text = heading
+        
+        # 检查是否是需要处理的标题级别
+        if not all_levels and level not in title_levels_set:
+            continue
+        
+        # 标准化标题文本（去除首尾空格并转换为小写）
+        normalized_title = title_text.strip().lower()
+        if collect_stats:
+            stats[level]['total'] += 1
+        
+        key = (level, normalized_title)
+        
+        # 检查标题是否重复
+        if key in seen_titles:
+            # 标题重复，删除该行（连同其后的换行符；若为最后一行则删除其前的换行符）
+            if collect_stats:
+                stats[level]['duplicated'] += 1
+                if len(stats[level]['titles']) < _MAX_REPORTED:
                     stats[level]['titles'].append(title_text.strip())
-                    continue
-                
-                # 记录标题
-                if level not in seen_titles:
-                    seen_titles[level] = set()
-                seen_titles[level].add(normalized_title)
+            buf.write(content[pos:m.start()])
+            if m.end() < len(content):
+                pos = m.end() + 1
+            else:
+                pos = m.end()
+                drop_last_sep = True
+            continue
         
-        # 添加当前行到结果中
-        result_lines.append(line)
+        # 记录标题
+        seen_titles.add(key)
+    
+    buf.write(content[pos:])
+    result = buf.getvalue()
+    if drop_last_sep and result.endswith('\n'):
+        result = result[:-1]
     
-    return '\n'.join(result_lines), stats
+    return result, stats
 
-def deduplicate_images(content):
+def _image_key(img_url, normalize=False, strip_query=False):
+    """
+    计算图片链接的去重键
+    
+    参数:
+        img_url (str): 图片URL
+        normalize (bool): 是否标准化（去除首尾空白与末尾斜杠并转换为小写）
+        strip_query (bool): 是否去除URL中的片段(#...)和查询参数(?...)
+    """
+    if strip_query:
+        img_url = img_url.split('#', 1)[0].split('?', 1)[0]
+    if normalize:
+        img_url = img_url.strip().rstrip('/').lower()
+    return img_url
+
+def deduplicate_images(content, collect_stats=True, normalize_urls=False, strip_query=False):
     """
     对文本内容中的图片链接进行去重处理
     
     参数:
         content (str): 要处理的文本内容
+        collect_stats (bool): 是否收集去重统计，为False时统计信息返回None
+        normalize_urls (bool): 是否按标准化后的URL判断重复（默认精确匹配）
+        strip_query (bool): 判断重复时是否忽略URL的片段和查询参数
     
     返回:
         tuple: (处理后的文本内容, 去重统计信息)
     """
-    # 图片链接正则表达式
-    img_pattern = r'!\[(.*?)\]\((.*?)\)'
-    
     # 记录已经出现过的图片链接
     seen_images = set()
     # 记录去重统计
-    stats = {'total': 0, 'duplicated': 0, 'images': []}
+    stats = {'total': 0, 'duplicated': 0, 'images': []} if collect_stats else None
+    
+    def _repl(match):
+        # 默认精确匹配图片URL，仅在显式开启时进行标准化
+        img_url = _image_key(match.group(2), normalize_urls, strip_query)
+        if img_url in seen_images:
+            # 图片链接重复，从行中删除这个图片链接
+            if collect_stats:
+                stats['total'] += 1
+                stats['duplicated'] += 1
+                if len(stats['images']) < _MAX_REPORTED:
+                    stats['images'].append(match.group(0))
+            return ''
+        # 记录图片链接
+        if collect_stats:
+            stats['total'] += 1
+        seen_images.add(img_url)
+        return match.group(0)
     
     lines = content.split('\n')
-    result_lines = []
+    # 输出写入 StringIO，每行后追加换行，结束时去掉最后一个换行
+    buf = io.StringIO()
     
     for line in lines:
-        # 查找行中的所有图片链接
-        images = re.findall(img_pattern, line)
+        # 不含 ![ 的行不可能有图片链接，直接添加
+        if '![' not in line:
+            buf.write(line)
+            buf.write('\n')
+            continue
+        
+        # 单次扫描替换行中的所有图片链接
+        new_line, count = _IMG_RE.subn(_repl, line)
         
         # 如果这行没有图片链接，直接添加
-        if not images:
-            result_lines.append(line)
+        if not count:
+            buf.write(line)
+            buf.write('\n')
             continue
         
-        # 处理这行中的图片链接
-        current_line = line
-        for alt_text, img_url in images:
-            # 精确匹配图片URL，不进行标准化以确保完全一致
-            stats['total'] += 1
-            
-            # 检查链接是否重复
-            if img_url in seen_images:
-                # 图片链接重复，从行中删除这个图片链接
-                stats['duplicated'] += 1
-                stats['images'].append(f"![{alt_text}]({img_url})")
-                current_line = current_line.replace(f"![{alt_text}]({img_url})", "", 1)
-            else:
-                # 记录图片链接
-                seen_images.add(img_url)
-        
         # 如果处理后的行不为空（或只包含空格），则添加到结果
-        if current_line.strip():
-            result_lines.append(current_line)
+        if new_line.strip():
+            buf.write(new_line)
+            buf.write('\n')
+    
+    return buf.getvalue()[:-1], stats
+
+def _decode(data):
+    """按 UTF-8 解码字节串，非法字节以代理字符保留，保证可逆"""
+    return data.decode('utf-8', 'surrogateescape')
+
+def _make_line_filter(dedup_titles=True, dedup_images=False, title_levels=None,
+                      normalize_urls=False, strip_query=False, seen_images=None):
+    """
+    构建逐行去重过滤器，标题与图片去重共用一次行扫描
+    
+    过滤器直接处理 bytes 行：标记符号 (#、![、]( 等) 均为 ASCII，
+    绝大多数行无需解码；只有候选标题行和需要判断是否为空的行才解码，
+    以保持与 str 版本一致的标题标准化与空白判断语义。
+    
+    参数:
+        seen_images (set): 已出现的图片链接集合；传入同一集合可实现跨文件图片去重
+    
+    返回:
+        callable: 接收一行 bytes，返回处理后的行；返回None表示丢弃该行
+    """
+    title_levels_set = set(title_levels if title_levels is not None else range(1, 7))
+    all_levels = title_levels_set >= _ALL_LEVELS
+    seen_titles = set()
+    if seen_images is None:
+        seen_images = set()
+    
+    def _repl(match):
+        img_url = match.group(2)
+        if normalize_urls or strip_query:
+            img_url = _image_key(_decode(img_url), normalize_urls, strip_query)
+        if img_url in seen_images:
+            return b''
+        seen_images.add(img_url)
+        return match.group(0)
+    
+    def _filter(line):
+        if dedup_titles and line.startswith(b'#'):
+            heading = _parse_heading(_decode(line))
+            if heading:
+                level, title_text = heading
+                if all_levels or level in title_levels_set:
+                    key = (level, title_text.strip().lower())
+                    if key in seen_titles:
+                        return None
+                    seen_titles.add(key)
+        if dedup_images and b'![' in line:
+            new_line, count = _IMG_BYTES_RE.subn(_repl, line)
+            if count:
+                if new_line.strip() and (new_line.isascii() or _decode(new_line).strip()):
+                    return new_line
+                return None
+        return line
+    
+    return _filter
+
+def _write_all(f, data):
+    """向无缓冲文件写入全部数据（原始写入可能只写入一部分）"""
+    view = memoryview(data)
+    while view:
+        view = view[f.write(view):]
+
+def process_stream(src_path, dst_path=None, dedup_titles=True, dedup_images=False, title_levels=None,
+                   normalize_urls=False, strip_query=False, seen_images=None):
+    """
+    流式处理Markdown文件：逐行读取、去重并写入临时文件，成功后原子替换目标文件
     
-    return '\n'.join(result_lines), stats
+    以二进制方式读写，跳过整文件的 UTF-8 解码/编码，换行符按原样保留
+    
+    参数:
+        src_path (str|Path): 源文件路径
+        dst_path (str|Path): 目标文件路径，为None时覆盖源文件
+        dedup_titles (bool): 是否进行标题去重
+        dedup_images (bool): 是否进行图片链接去重
+        title_levels (list): 要处理的标题级别列表
+        normalize_urls (bool): 是否按标准化后的URL判断图片重复
+        strip_query (bool): 判断图片重复时是否忽略URL的片段和查询参数
+        seen_images (set): 跨文件共享的已出现图片链接集合，为None时仅在本文件内去重
+    
+    返回:
+        bool: 内容是否发生变化；原地处理且无变化时不会改写文件
+    """
+    # 解析符号链接：临时文件建在真实文件旁并替换真实文件，链接本身保持不变
+    dst_path = Path(os.path.realpath(dst_path if dst_path is not None else src_path))
+    in_place = os.path.realpath(src_path) == str(dst_path)
+    line_filter = _make_line_filter(dedup_titles, dedup_images, title_levels, normalize_urls, strip_query, seen_images)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{dst_path.name}.", suffix=".tmp", dir=dst_path.parent)
+    changed = False
+    try:
+        # 输出端不使用 io 缓冲，由 bytearray 在用户态攒批，每满 _STREAM_BUFFER 写一次
+        with open(src_path, 'rb', buffering=_STREAM_BUFFER) as f_in, \
+                open(fd, 'wb', buffering=0) as f_out:
+            out = bytearray()
+            for line in f_in:
+                new_line = line_filter(line)
+                if new_line is None:
+                    changed = True
+                    continue
+                if new_line != line:
+                    changed = True
+                out += new_line
+                if len(out) >= _STREAM_BUFFER:
+                    _write_all(f_out, out)
+                    out.clear()
+            if out:
+                _write_all(f_out, out)
+        if changed or not in_place:
+            # mkstemp 创建的临时文件权限为 0600，替换前沿用目标文件（不存在时为源文件）的权限
+            shutil.copymode(dst_path if dst_path.exists() else src_path, tmp_path)
+            os.replace(tmp_path, dst_path)
+        else:
+            # 无变化时丢弃临时文件，避免无意义的写入和时间戳变更
+            os.unlink(tmp_path)
+        return changed
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
 def setup_presets_dir():
     """设置预设目录"""
     presets_dir = Path.home() / ".glowtoolbox" / "presets"
@@ -131,6 +335,7 @@ def setup_presets_dir():
 
 def load_presets(presets_file):
     """加载预设配置"""
+    console = _get_console()
     if presets_file.exists():
         try:
             with open(presets_file, 'r', encoding='utf-8') as f:
@@ -141,6 +346,7 @@ def load_presets(presets_file):
 
 def save_preset(presets_file, name, config):
     """保存预设配置"""
+    console = _get_console()
     presets = load_presets(presets_file)
     presets[name] = config
     try:
@@ -152,6 +358,8 @@ def save_preset(presets_file, name, config):
 
 def show_presets(presets_file):
     """显示预设列表并选择"""
+    from rich.prompt import Prompt
+    console = _get_console()
     presets = load_presets(presets_file)
     if not presets:
         console.print("[yellow]没有找到保存的预设[/yellow]")
@@ -183,7 +391,28 @@ def show_presets(presets_file):
         console.print("[yellow]无效的输入，使用默认配置[/yellow]")
         return None
 
+def _parse_title_levels(spec):
+    """解析标题级别输入，如"1,2,3"、"1-3,5"，一次遍历得到 1-6 范围内去重排序后的级别列表
+
+    Raises:
+        ValueError: 输入中含有无法解析为整数的部分
+    """
+    def _iter_levels():
+        for part in spec.split(','):
+            if '-' in part:
+                start, end = part.split('-', 1)
+                yield from range(int(start), int(end) + 1)
+            else:
+                yield int(part)
+    return sorted({level for level in _iter_levels() if 1 <= level <= 6})
+
 def main():
+    from rich.panel import Panel
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from rich.prompt import Prompt, Confirm
+    from rich.table import Table
+    console = _get_console()
+    
     console.print(Panel.fit("Markdown内容去重工具", style="bold blue", subtitle="处理Markdown文件中的重复标题和图片链接"))
     
     # 设置预设目录
@@ -237,9 +466,7 @@ def main():
     
     if title_levels_input:
         try:
-            title_levels = [int(level) for level in title_levels_input.split(',')]
-            # 确保所有级别都在1-6范围内
-            title_levels = [level for level in title_levels if 1 <= level <= 6]
+            title_levels = _parse_title_levels(title_levels_input)
         except ValueError:
             console.print("[bold red]错误:[/] 标题级别必须是1到6之间的整数，用逗号分隔", style="red")
             return
@@ -253,9 +480,7 @@ def main():
                 default=",".join(map(str, title_levels))
             )
             try:
-                title_levels = [int(level) for level in title_levels_str.split(',')]
-                # 确保所有级别都在1-6范围内
-                title_levels = [level for level in title_levels if 1 <= level <= 6]
+                title_levels = _parse_title_levels(title_levels_str)
             except ValueError:
                 console.print("[bold red]错误:[/] 标题级别必须是1到6之间的整数，用逗号分隔", style="red")
                 return
@@ -281,7 +506,7 @@ def main():
         task = progress.add_task("正在读取文件...", total=1)
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
+            with open(file_path, 'r', encoding='utf-8', buffering=_STREAM_BUFFER) as file:
                 content = file.read()
             progress.update(task, advance=1)
         except Exception as e:
@@ -324,7 +549,7 @@ def main():
         task = progress.add_task("正在写入结果...", total=1)
         
         try:
-            with open(output_file, 'w', encoding='utf-8') as file:
+            with open(output_file, 'w', encoding='utf-8', buffering=_STREAM_BUFFER) as file:
                 file.write(content)
             progress.update(task, advance=1)
         except Exception as e:
@@ -383,6 +608,9 @@ def main():
                     console.print(f"\n[bold]H{level} 级标题重复:[/]")
                     for i, title in enumerate(title_stats[level]['titles']):
                         console.print(f"  {i+1}. [italic]{title}[/]")
+                    remaining = title_stats[level]['duplicated'] - len(title_stats[level]['titles'])
+                    if remaining > 0:
+                        console.print(f"  [dim]…(还有 {remaining} 个未列出)[/]")
     
     # 显示图片链接去重统计信息
     if dedup_images and image_stats:
@@ -406,6 +634,9 @@ def main():
             console.print("\n[bold yellow]重复图片链接列表:[/]")
             for i, image in enumerate(image_stats['images']):
                 console.print(f"  {i+1}. [italic]{image}[/]")
+            remaining = duplicated_images - len(image_stats['images'])
+            if remaining > 0:
+                console.print(f"  [dim]…(还有 {remaining} 个未列出)[/]")
     
     console.print(f"\n[bold green]处理完成！[/] 输出文件: [bold blue]{output_file}[/]")
     console.print(f"原始文件大小: [cyan]{os.path.getsize(file_path):,}[/] 字节")
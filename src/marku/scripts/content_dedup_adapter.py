@@ -4,10 +4,33 @@
 """
 from __future__ import annotations
 
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, Iterator, List, Optional
 
-from .content_dedup import deduplicate_titles, deduplicate_images
+from . import content_dedup as _content_dedup
+from .content_dedup import process_stream
+from .md_files import iter_md_files
+from .run_cache import load_cache, save_cache, source_digest
+
+
+# 持久化缓存名称（~/.glowtoolbox/cache/content_dedup.json）
+CACHE_NAME = "content_dedup"
+
+
+def _process_one(path: Path, dedup_titles: bool, dedup_images: bool, title_levels: List[int],
+                 normalize_urls: bool = False, strip_query: bool = False, seen_images: Optional[set] = None):
+    """单文件读取 / 去重 / 写回，供进程池调用（需为顶层函数以便 pickle）。
+
+    返回 (路径, 是否改变, 处理后的 mtime_ns, 处理后的大小)。
+    """
+    changed = process_stream(path, path, dedup_titles, dedup_images, title_levels,
+                             normalize_urls, strip_query, seen_images)
+    st = path.stat()
+    return str(path.resolve()), changed, st.st_mtime_ns, st.st_size
 
 
 class ContentDedupRunner:
@@ -15,29 +38,82 @@ class ContentDedupRunner:
         input_path = Path(config.get("input", context.root))
         dedup_titles = bool(config.get("dedup_titles", True))
         dedup_images = bool(config.get("dedup_images", False))
+        # 图片 URL 标准化：大小写/末尾斜杠 与 查询参数/片段 分别可控
+        normalize_urls = bool(config.get("image_normalize", False))
+        strip_query = bool(config.get("image_strip_query", False))
+        # 跨文件图片去重：同一图片链接在整个目录中只保留首次出现
+        global_images = dedup_images and bool(config.get("global_image_dedup", False))
         title_levels = config.get("title_levels") or list(range(1, 7))
         if isinstance(title_levels, list):
             title_levels = [int(x) for x in title_levels if 1 <= int(x) <= 6]
 
-        files: List[Path] = []
+        # 文件列表以生成器形式提供，进程池可在扫描完成前开始处理
         if input_path.is_file() and input_path.suffix.lower() == ".md":
-            files.append(input_path)
+            single = True
+            files: Iterable[Path] = [input_path]
         elif input_path.is_dir():
-            files.extend([p for p in input_path.glob("*.md") if p.is_file()])
+            single = False
+            files = (Path(p) for p in iter_md_files(str(input_path), bool(config.get("recursive", False))))
+            if global_images:
+                # “首次出现”依赖处理顺序，按路径排序保证结果可复现
+                files = sorted(files)
         else:
             print(f"[content_dedup] 无效输入: {input_path}")
             return
 
+        # 可选持久化缓存：mtime+size+配置签名均未变化的文件直接跳过读取
+        # 跨文件去重需要读取每个文件以登记其图片，此时不使用缓存
+        use_cache = bool(config.get("cache", False)) and not global_images
+        # 签名包含去重逻辑所在源码的摘要，逻辑有改动时已有缓存自动失效
+        signature = json.dumps([dedup_titles, dedup_images, title_levels, normalize_urls, strip_query,
+                                source_digest(_content_dedup.__file__, __file__)])
+        cache: Dict[str, Any] = load_cache(CACHE_NAME) if use_cache else {}
+        scanned = 0
+
+        def _pending(paths: Iterable[Path]) -> Iterator[Path]:
+            nonlocal scanned
+            for p in paths:
+                scanned += 1
+                if use_cache:
+                    entry = cache.get(str(p.resolve()))
+                    if entry:
+                        st = p.stat()
+                        if entry == [st.st_mtime_ns, st.st_size, signature]:
+                            continue
+                yield p
+
+        worker = partial(
+            _process_one,
+            dedup_titles=dedup_titles,
+            dedup_images=dedup_images,
+            title_levels=title_levels,
+            normalize_urls=normalize_urls,
+            strip_query=strip_query,
+            seen_images=set() if global_images else None,
+        )
+        workers = int(config.get("workers") or os.cpu_count() or 1)
         processed = 0
-        for f in files:
-            text = f.read_text(encoding="utf-8")
-            if dedup_titles:
-                text, _ = deduplicate_titles(text, title_levels)
-            if dedup_images:
-                text, _ = deduplicate_images(text)
-            f.write_text(text, encoding="utf-8")
+        changed = 0
+        results = []
+        # 跨文件去重依赖共享的 seen_images 集合，为避免跨进程加锁同步，改为串行处理
+        if workers > 1 and not single and not global_images:
+            # 每个文件的去重状态相互独立，可直接按文件并行
+            chunksize = max(1, int(config.get("chunksize", 4)))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for res in executor.map(worker, _pending(files), chunksize=chunksize):
+                    results.append(res)
+        else:
+            for f in _pending(files):
+                results.append(worker(f))
+        for key, was_changed, mtime_ns, size in results:
             processed += 1
-        print(f"[content_dedup] 处理完成: {processed}/{len(files)}")
+            if was_changed:
+                changed += 1
+            if use_cache:
+                cache[key] = [mtime_ns, size, signature]
+        if use_cache:
+            save_cache(CACHE_NAME, cache)
+        print(f"[content_dedup] 处理完成: {processed}/{scanned} changed={changed}")
 
 
 Runner = ContentDedupRunner
@@ -1,19 +1,32 @@
 import re
-import cn2an
-import pangu
 import logging
 import os
+import json
 import sys
 import argparse
+import io
 import time
+import shutil
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from itertools import chain, repeat
 from datetime import datetime
+from pathlib import Path
 from colorama import init, Fore, Style
 from rich.prompt import Prompt, Confirm  # 导入rich提示模块
 
+from .md_files import iter_md_files
+from .run_cache import load_cache, save_cache, source_digest
+
 
 # 初始化 colorama
 init()
 
+# 高频回调中的调试日志通过该 logger 按级别判断后再格式化
+logger = logging.getLogger(__name__)
+
 
 # 设置日志
 # logging, config_info = setup_logging({
@@ -23,88 +36,96 @@ init()
 
 # 添加统计变量
 
-stats = {
-    "processed_files": 0,
-    "total_chars_processed": 0,
-    "format_changes": 0,
-    "pattern_matches": {}
-}
+def new_stats():
+    """创建一份空的统计字典"""
+    return {
+        "processed_files": 0,
+        "total_chars_processed": 0,
+        "format_changes": 0,
+        "changed_files": 0,
+        "pattern_matches": Counter()
+    }
+
+def merge_stats(total, part):
+    """将单个文件的统计合并到汇总统计中"""
+    total["processed_files"] += part["processed_files"]
+    total["total_chars_processed"] += part["total_chars_processed"]
+    total["format_changes"] += part["format_changes"]
+    total["changed_files"] += part["changed_files"]
+    total["pattern_matches"].update(part["pattern_matches"])
+
+# 汇总统计（多进程处理时由主进程合并各文件返回的统计）
+stats = new_stats()
 
 class CodeBlockProtector:
-    def __init__(self):
-        self.code_block_pattern = re.compile(r'```[\s\S]*?```')
-        self.inline_code_pattern = re.compile(r'`[^`]+`')
-        # 添加新的正则表达式匹配 Markdown 图片和链接
-        self.md_image_pattern = re.compile(r'!\[(.*?)\]\((.*?)\)')
-        self.md_link_pattern = re.compile(r'(?<!!)\[(.*?)\]\((.*?)\)')
-        # 添加有序列表保护模式，匹配连续的数字编号列表项
-        self.ordered_list_pattern = re.compile(r'(?:^\d+\.\s+.*?$\n)+', re.MULTILINE)
+    # 正则在类定义时编译一次，所有实例共享
+    code_block_pattern = re.compile(r'```[\s\S]*?```')
+    inline_code_pattern = re.compile(r'`[^`]+`')
+    # 添加新的正则表达式匹配 Markdown 图片和链接
+    md_image_pattern = re.compile(r'!\[(.*?)\]\((.*?)\)')
+    md_link_pattern = re.compile(r'(?<!!)\[(.*?)\]\((.*?)\)')
+    # 添加有序列表保护模式，匹配连续的数字编号列表项
+    ordered_list_pattern = re.compile(r'(?:^\d+\.\s+.*?$\n)+', re.MULTILINE)
+    
+    # 五类保护合并为一个交替正则，一次 finditer 完成全部保护；
+    # 同一位置按分组顺序优先：代码块 > 行内代码 > 图片 > 链接 > 有序列表
+    _kinds = (
+        ("代码块", code_block_pattern),
+        ("行内代码", inline_code_pattern),
+        ("Markdown图片", md_image_pattern),
+        ("Markdown链接", md_link_pattern),
+        ("有序列表", ordered_list_pattern),
+    )
+    protect_pattern = re.compile(
+        '|'.join(f'(?P<k{i}>{p.pattern})' for i, (_, p) in enumerate(_kinds)),
+        re.MULTILINE,
+    )
+    
+    # 所有占位符共享同一命名空间：\x00P\x00<序号>\x00，恢复时一次扫描完成
+    placeholder_pattern = re.compile('\x00P\x00(\\d+)\x00')
     
     def protect_codes(self, text):
         """保护代码块、行内代码和Markdown链接"""
-        self.code_blocks = []
-        self.inline_codes = []
-        self.md_images = []
-        self.md_links = []
-        self.ordered_lists = []  # 新增有序列表保存列表
+        # 原文中含 NUL 字符时占位符可能与原文混淆，此时不做保护
+        if '\x00' in text:
+            logging.warning("文本中包含NUL字符，跳过代码块保护")
+            self._store = None
+            return text
+        self._store = store = []
+        # 每次调用只判断一次日志级别，未开启 DEBUG 时不再格式化日志
+        debug = logger.isEnabledFor(logging.DEBUG)
         
-        # 保护代码块
-        def save_code_block(match):
-            self.code_blocks.append(match.group(0))
-            logging.debug(f"保护代码块: {match.group(0)[:50]}...")
-            return f'CODE_BLOCK_{len(self.code_blocks)-1}'
-        
-        # 保护行内代码
-        def save_inline_code(match):
-            self.inline_codes.append(match.group(0))
-            logging.debug(f"保护行内代码: {match.group(0)}")
-            return f'INLINE_CODE_{len(self.inline_codes)-1}'
-            
-        # 保护 Markdown 图片
-        def save_md_image(match):
-            self.md_images.append(match.group(0))
-            logging.debug(f"保护Markdown图片: {match.group(0)[:50]}...")
-            return f'MD_IMAGE_{len(self.md_images)-1}'
-            
-        # 保护 Markdown 链接
-        def save_md_link(match):
-            self.md_links.append(match.group(0))
-            logging.debug(f"保护Markdown链接: {match.group(0)[:50]}...")
-            return f'MD_LINK_{len(self.md_links)-1}'
-            
-        # 保护有序列表
-        def save_ordered_list(match):
-            self.ordered_lists.append(match.group(0))
-            logging.debug(f"保护有序列表: {match.group(0)[:50]}...")
-            return f'ORDERED_LIST_{len(self.ordered_lists)-1}'
-        
-        # 顺序很重要：先保护代码块，再保护行内代码，然后保护链接，最后保护有序列表
-        text = self.code_block_pattern.sub(save_code_block, text)
-        text = self.inline_code_pattern.sub(save_inline_code, text)
-        text = self.md_image_pattern.sub(save_md_image, text)
-        text = self.md_link_pattern.sub(save_md_link, text)
-        text = self.ordered_list_pattern.sub(save_ordered_list, text)
-        return text
+        # 单次扫描：匹配之间的原文与占位符依次写入片段列表，最后一次拼接。
+        # 各类匹配互不嵌套，从左到右取最先出现的片段；
+        # 与旧的逐类替换相比，仅在不同类别的片段交叉重叠时取舍可能不同
+        pieces = []
+        pos = 0
+        for match in self.protect_pattern.finditer(text):
+            pieces.append(text[pos:match.start()])
+            store.append(match.group(0))
+            if debug:
+                kind = self._kinds[int(match.lastgroup[1:])][0]
+                logger.debug("保护%s: %s...", kind, match.group(0)[:50])
+            pieces.append(f'\x00P\x00{len(store)-1}\x00')
+            pos = match.end()
+        if not store:
+            return text
+        pieces.append(text[pos:])
+        return ''.join(pieces)
     
     def restore_codes(self, text):
         """恢复代码块、行内代码和Markdown链接"""
-        # 恢复顺序与保护顺序相反
-        for i, ordered_list in enumerate(self.ordered_lists):
-            text = text.replace(f'ORDERED_LIST_{i}', ordered_list)
-            
-        for i, link in enumerate(self.md_links):
-            text = text.replace(f'MD_LINK_{i}', link)
-            
-        for i, image in enumerate(self.md_images):
-            text = text.replace(f'MD_IMAGE_{i}', image)
-        
-        for i, code in enumerate(self.inline_codes):
-            text = text.replace(f'INLINE_CODE_{i}', code)
-        
-        for i, block in enumerate(self.code_blocks):
-            text = text.replace(f'CODE_BLOCK_{i}', block)
-        
-        return text
+        store = getattr(self, '_store', None)
+        if not store:
+            return text
+        # 存储的片段均已是原文，单次替换即可完整恢复
+        return self.placeholder_pattern.sub(lambda m: store[int(m.group(1))], text)
+
+# 行内标题标记：2-6 个 # 组成的完整 # 串，后跟一个空格
+INLINE_HEADER_PATTERN = re.compile(r'(?<!#)(#{2,6}) ')
+# 标题行：行首 1-6 个 #（完整的 # 串）后跟一个空格，group(2) 为标题内容
+HEADER_LINE_PATTERN = re.compile(r'(#{1,6}) (.*)')
+
 class TextFormatter:
     def __init__(self):
         self.code_protector = CodeBlockProtector()
@@ -115,7 +136,7 @@ class TextFormatter:
         # text = self.code_protector.protect_codes(text)
         
         # 使用 pangu 处理中英文格式
-        # text = pangu.spacing_text(text)  # 自动处理中英文间距
+        # text = pangu.spacing_text(text)  # 自动处理中英文间距（启用时需 import pangu）
         
         # 处理全角字符转半角
         # text = self.full_to_half(text)
@@ -128,7 +149,12 @@ class TextFormatter:
         return text
     def handle_consecutive_headers(self, text):
         """处理连续的同级标题，将连续3个以上的同级标题转为普通文本"""
+        # 没有任何 # 时两趟处理都不会改变文本，直接返回，省去整篇 split/join
+        if '#' not in text:
+            return text
+        
         # 处理多行中的连续标题
+        # 注意：这里不能换成 splitlines()，它会额外按 \r、\x0c 等字符分行并丢弃末尾空行
         lines = text.split('\n')
         result_lines = []
         
@@ -139,17 +165,12 @@ class TextFormatter:
         for line in lines:
             # 检查是否是标题行(以#开头)
             if line.startswith('#'):
-                # 计算#号数量
-                level = 0
-                for char in line:
-                    if char == '#':
-                        level += 1
-                    else:
-                        break
+                m = HEADER_LINE_PATTERN.match(line)
+                level = m.end(1) if m else 0
                         
                 # 只处理2-6级标题
-                if 2 <= level <= 6 and len(line) > level and line[level] == ' ':
-                    content = line[level+1:]  # 标题内容(跳过#和空格)
+                if level >= 2:
+                    content = m.group(2)  # 标题内容(跳过#和空格)
                     
                     if level == current_level:
                         consecutive_headers.append((line, content))
@@ -160,7 +181,7 @@ class TextFormatter:
                             result_lines.extend([h[0] for h in consecutive_headers[:2]])
                             # 后面的只保留内容
                             result_lines.extend([h[1] for h in consecutive_headers[2:]])
-                            logging.info(f"转换了 {len(consecutive_headers)-2} 个连续的 {current_level} 级标题为普通文本")
+                            logging.info("转换了 %d 个连续的 %d 级标题为普通文本", len(consecutive_headers)-2, current_level)
                         else:
                             # 不足3个，全部保留
                             result_lines.extend([h[0] for h in consecutive_headers])
@@ -173,7 +194,7 @@ class TextFormatter:
                     if len(consecutive_headers) >= 2:
                         result_lines.extend([h[0] for h in consecutive_headers[:2]])
                         result_lines.extend([h[1] for h in consecutive_headers[2:]])
-                        logging.info(f"转换了 {len(consecutive_headers)-2} 个连续的 {current_level} 级标题为普通文本")
+                        logging.info("转换了 %d 个连续的 %d 级标题为普通文本", len(consecutive_headers)-2, current_level)
                     else:
                         result_lines.extend([h[0] for h in consecutive_headers])
                     
@@ -185,7 +206,7 @@ class TextFormatter:
                 if len(consecutive_headers) >= 2:
                     result_lines.extend([h[0] for h in consecutive_headers[:2]])
                     result_lines.extend([h[1] for h in consecutive_headers[2:]])
-                    logging.info(f"转换了 {len(consecutive_headers)-2} 个连续的 {current_level} 级标题为普通文本")
+                    logging.info("转换了 %d 个连续的 %d 级标题为普通文本", len(consecutive_headers)-2, current_level)
                 else:
                     result_lines.extend([h[0] for h in consecutive_headers])
                 
@@ -198,115 +219,151 @@ class TextFormatter:
         if len(consecutive_headers) >= 3:
             result_lines.extend([h[0] for h in consecutive_headers[:2]])
             result_lines.extend([h[1] for h in consecutive_headers[2:]])
-            logging.info(f"转换了 {len(consecutive_headers)-2} 个连续的 {current_level} 级标题为普通文本")
+            logging.info("转换了 %d 个连续的 %d 级标题为普通文本", len(consecutive_headers)-2, current_level)
         else:
             result_lines.extend([h[0] for h in consecutive_headers])
         
-        # 处理单行中的连续标题
-        processed_text = '\n'.join(result_lines)
-        
-        # 收集需要处理的行和位置信息
-        lines_to_process = []  # 存储需要处理的行和位置信息
-        
-        for line_number, line in enumerate(processed_text.split('\n')):
-            # 查找行内的所有标题位置
-            header_positions = []  # 存储标题位置
-            header_levels = []     # 存储标题级别
-            i = 0
-            
-            while i < len(line):
-                # 检查是否可能是标题标记(至少2个#)
-                if i < len(line) - 1 and line[i] == '#' and line[i+1] == '#':
-                    start = i
-                    level = 0
-                    
-                    # 计算连续的#号数量
-                    while i < len(line) and line[i] == '#':
-                        level += 1
-                        i += 1
-                    
-                    # 标题后面必须有空格
-                    if i < len(line) and line[i] == ' ' and 2 <= level <= 6:
-                        header_positions.append((start, i+1))  # 保存标题标记的起始和结束位置(包括空格)
-                        header_levels.append(level)
-                        continue
-                i += 1
-            
-            # 如果发现至少3个同级标题，添加到处理列表
-            if len(header_positions) >= 3:
-                # 检查是否是同级标题
-                first_level = header_levels[0]
-                if all(level == first_level for level in header_levels):
-                    lines_to_process.append((line_number, line, header_positions, first_level))
-        
-        # 处理需要修改的行
-        if lines_to_process:
-            result_lines = processed_text.split('\n')
+        # 处理单行中的连续标题：直接在 result_lines 上原地处理，避免 join/split 往返
+        for line_number, line in enumerate(result_lines):
+            if '##' not in line:
+                continue
+            # 查找行内的所有标题位置(标题标记及其后的空格)
+            matches = list(INLINE_HEADER_PATTERN.finditer(line))
             
-            for line_number, line, positions, level in lines_to_process:
-                logging.info(f"处理行 {line_number+1} 中的 {len(positions)} 个连续 {level} 级标题")
-                
-                # 保持前两个标题不变，修改后续标题
-                new_line = line
-                
-                # 从后往前处理，避免修改位置影响
-                for i in range(len(positions)-1, 1, -1):
-                    start, end = positions[i]
-                    # 替换第三个及之后的标题标记（包括后面的空格）
-                    new_line = new_line[:start] + new_line[end:]
-                
-                result_lines[line_number] = new_line
-                logging.info("处理单行连续标题，移除了标题标记")
+            # 如果发现至少3个同级标题，进行处理
+            if len(matches) < 3:
+                continue
+            level = len(matches[0].group(1))
+            if any(len(m.group(1)) != level for m in matches):
+                continue
             
-            processed_text = '\n'.join(result_lines)
+            logging.info("处理行 %d 中的 %d 个连续 %d 级标题", line_number+1, len(matches), level)
+            # 保持前两个标题不变，移除第三个及之后的标题标记（包括后面的空格）
+            pieces = []
+            pos = 0
+            for m in matches[2:]:
+                pieces.append(line[pos:m.start()])
+                pos = m.end()
+            pieces.append(line[pos:])
+            result_lines[line_number] = ''.join(pieces)
+            logging.info("处理单行连续标题，移除了标题标记")
+        
+        processed_text = '\n'.join(result_lines)
         
-        logging.info(f"处理完成，文本长度: {len(processed_text)}")
+        logging.info("处理完成，文本长度: %d", len(processed_text))
         return processed_text    
+    # 全角转半角映射表（单字符，类加载时构建一次）
+    _FULL_HALF_TRANS = str.maketrans({
+        # '：': ':',
+        # '；': ';',
+        # '，': ',',
+        # '。': '.',
+        # '！': '!',
+        # '？': '?',
+        '（': '(',
+        '）': ')',
+        '［': '[',
+        '］': ']',
+        '【': '[',
+        '】': ']',
+        '｛': '{',
+        '｝': '}',
+        '\u201c': '"',
+        '\u201d': '"',
+        '\u2018': "'",
+        '\u2019': "'",
+        '｜': '|',
+        '＼': '\\',
+        '／': '/',
+        # '《': '<',
+        # '》': '>',
+        '％': '%',
+        '＃': '#',
+        '＆': '&',
+        '＊': '*',
+        '＠': '@',
+        '＾': '^',
+        '～': '~',
+        '｀': '`',
+    })
+
     def full_to_half(self, text):
         """全角转半角"""
-        full_half_map = {
-            # '：': ':',
-            # '；': ';',
-            # '，': ',',
-            # '。': '.',
-            # '！': '!',
-            # '？': '?',
-            '（': '(',
-            '）': ')',
-            '［': '[',
-            '］': ']',
-            '【': '[',
-            '】': ']',
-            '｛': '{',
-            '｝': '}',
-            '"': '"',
-            '"': '"',
-            ''': "'",
-            ''': "'",
-            '｜': '|',
-            '＼': '\\',
-            '／': '/',
-            # '《': '<',
-            # '》': '>',
-            '％': '%',
-            '＃': '#',
-            '＆': '&',
-            '＊': '*',
-            '＠': '@',
-            '＾': '^',
-            '～': '~',
-            '｀': '`',
-            ' 、':'、'
-        }
-        for full, half in full_half_map.items():
-            text = text.replace(full, half)
-        return text
+        # 单字符映射由 translate 一次扫描完成，唯一的多字符规则单独处理
+        return text.translate(self._FULL_HALF_TRANS).replace(' 、', '、')
 
 # 定义你的文件路径
 import os
 current_dir = os.path.dirname(__file__)
 file_path = os.path.join(current_dir, '1.md')
 
+# cn2an 导入开销较大，仅在首次需要转换中文数字时导入
+_cn2an = None
+
+def _get_cn2an():
+    global _cn2an
+    if _cn2an is None:
+        import cn2an
+        _cn2an = cn2an
+    return _cn2an
+
+_CN_DIGITS = '一二三四五六七八九'
+
+def _cn_normalize_small(chinese_num):
+    """
+    查表规范化 1-99 的常见写法（X、十、十X、X十、X十Y），与 cn2an 往返转换结果一致；
+    其他写法返回None，交由 cn2an 处理
+    """
+    head, sep, tail = chinese_num.partition('十')
+    if not sep:
+        return chinese_num if len(chinese_num) == 1 and chinese_num in _CN_DIGITS else None
+    if len(head) > 1 or len(tail) > 1 or (head and head not in _CN_DIGITS) or (tail and tail not in _CN_DIGITS):
+        return None
+    # 一十X 的标准写法省略 "一"
+    return ('' if head == '一' else head) + '十' + tail
+
+@lru_cache(maxsize=2048)
+def _cn_normalize(chinese_num):
+    """将中文数字规范化为标准写法（经阿拉伯数字往返转换），结果缓存"""
+    # 章节编号绝大多数在 1-99 之内，查表即可，无需导入 cn2an
+    small = _cn_normalize_small(chinese_num)
+    if small is not None:
+        return small
+    cn2an = _get_cn2an()
+    return cn2an.an2cn(cn2an.cn2an(chinese_num, mode='smart'))
+
+# 中文数字中的特殊字符（单字符映射，translate 一次完成）
+_SPECIAL_NUM_TRANS = str.maketrans({'〇': '零', '两': '二'})
+
+@lru_cache(maxsize=4096)
+def _format_header(format_type, number):
+    """
+    根据标题类型和匹配到的编号生成标题前缀，结果缓存，
+    文档中反复出现的相同编号（如"第三章"）只在首次出现时转换
+    """
+    # 处理数字标题的特殊情况
+    if format_type in ['number_title', 'number_subtitle']:
+        formats = {
+            'number_title': f'##### {number}. ',
+            'number_subtitle': f'###### {number}. '
+        }
+        return formats.get(format_type)
+        
+    # 处理中文数字的情况：特殊字符统一为标准写法
+    number = number.translate(_SPECIAL_NUM_TRANS)
+        
+    standard_chinese = _cn_normalize(number)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("转换数字: %s -> %s", number, standard_chinese)
+    
+    formats = {
+        'chapter': f'# 第{standard_chinese}章 ',
+        'section': f'## 第{standard_chinese}节 ',
+        'subsection': f'### {standard_chinese}、',
+        'subsubsection': f'#### ({standard_chinese}) '
+    }
+    return formats.get(format_type)
+
 def convert_number(match, format_type):
     """
     通用的中文数字转换函数
@@ -319,50 +376,16 @@ def convert_number(match, format_type):
         'number_subtitle': 数字子标题
     """
     try:
-        # 处理数字标题的特殊情况
-        if format_type in ['number_title', 'number_subtitle']:
-            number = match.group(1)
-            formats = {
-                'number_title': f'##### {number}. ',
-                'number_subtitle': f'###### {number}. '
-            }
-            result = formats.get(format_type)
-            logging.info(f"转换数字标题成功: {match.group(0)} -> {result}")
-            return result
-            
-        # 处理中文数字的情况
-        chinese_num = match.group(1)
-        # 检查是否是特殊字符
-        special_chars = {'〇': '零', '两': '二'}
-        if chinese_num in special_chars:
-            chinese_num = special_chars[chinese_num]
-            
-        logging.debug(f"尝试转换数字: {chinese_num}")
-        arabic_num = cn2an.cn2an(chinese_num, mode='smart')
-        standard_chinese = cn2an.an2cn(arabic_num)
-        
-        formats = {
-            'chapter': f'# 第{standard_chinese}章 ',
-            'section': f'## 第{standard_chinese}节 ',
-            'subsection': f'### {standard_chinese}、',
-            'subsubsection': f'#### ({standard_chinese}) '
-        }
-        result = formats.get(format_type, match.group(0))
-        logging.info(f"转换标题成功: {match.group(0)} -> {result}")
-        return result
+        result = _format_header(format_type, match.group(1))
+        # 未知类型保持原样
+        return match.group(0) if result is None else result
     except Exception as e:
         logging.error(f"转换标题失败: {match.group(0)}, 错误: {str(e)}")
         # 如果转换失败，保持原样
         return match.group(0)
 
-# 修改patterns_and_replacements，移除标题格式化相关正则
-patterns_and_replacements = [
-    # 1. 基础格式清理
-    (r'^ ',r''),  # 删除行首空格
-    (r'(?:\r?\n){3,}', r'\n\n'),  # 将连续3个以上空行替换为两个空行
-    (r'^.*?目\s{0,10}录.*$\n?', r''),  # 新增：修复"目 录"错误 spacing
-    
-    # 2. 中英文标点符号统一 (注意: 标题格式化正则已移至process_headers_by_level函数)
+# 中英文标点符号统一规则：均为互不影响的字面量替换，可合并为单次扫描
+PUNCTUATION_PATTERNS = [
     (r'\（', r'('),  # 中文括号转英文
     (r'\）', r')'),
     (r'\「', r'['),  # 中文引号转方括号
@@ -378,6 +401,17 @@ patterns_and_replacements = [
     (r'\？', r'?'),  # 中文问号转英文
     (r'\"\"|\"', r'"'),  # 中文引号转英文
     (r'\'\'|\'', r"'"),
+]
+
+# 修改patterns_and_replacements，移除标题格式化相关正则
+patterns_and_replacements = [
+    # 1. 基础格式清理
+    (r'^ ',r''),  # 删除行首空格
+    (r'(?:\r?\n){3,}', r'\n\n'),  # 将连续3个以上空行替换为两个空行
+    (r'^.*?目\s{0,10}录.*$\n?', r''),  # 新增：修复"目 录"错误 spacing
+    
+    # 2. 中英文标点符号统一 (注意: 标题格式化正则已移至process_headers_by_level函数)
+    *PUNCTUATION_PATTERNS,
     
     # 3. 表格格式优化
     (r'([^|])\n\|(.*?\|.*?\|.*?\n)',r'\1\n\n|\2'),  # 在表格前文字后添加换行
@@ -401,9 +435,68 @@ patterns_and_replacements = [
     (r'^\[([\u4e00-\u9fa5A-Za-z0-9]+)\]',r'`[\1]`'),  # 将方括号内容转为代码格式
 ]
 
-def remove_empty_table_rows(text):
-    """处理表格中的连续空行和首尾空行"""
-    lines = text.split('\n')
+def merge_patterns(rules):
+    """
+    将互不影响的字面量替换规则合并为一个带命名分组的交替正则，一次扫描完成全部替换。
+    仅适用于各规则的输出不会成为其他规则输入、且替换串不含反向引用的规则。
+    外层命名分组最后闭合，匹配对象的 lastindex 即为命中规则的分组号；
+    替换结果按分组号存入元组，直接整数下标取值，无需以分组名字符串查字典
+    """
+    merged = re.compile('|'.join(f'(?P<g{i}>{p})' for i, (p, _) in enumerate(rules)), re.MULTILINE)
+    table = [None] * (merged.groups + 1)
+    for i, (_, repl) in enumerate(rules):
+        table[merged.groupindex[f'g{i}']] = repl
+    replacements = tuple(table)
+    return merged, lambda m: replacements[m.lastindex]
+
+# 规则的触发子串：规则的每个匹配都至少包含其中之一，
+# 文本中一个都不含时可跳过该规则，用 C 层的子串查找代替一次失败的正则扫描。
+# LaTeX 规则共用 $ 定界符、且按顺序相互影响（如 "$+$=$"），不能合并为一次交替匹配，
+# 逐条执行但先做子串查找，不含公式记号的文本不再逐条扫描整篇。
+# core.content_replace 的基础规则与此相同，直接复用本表
+RULE_TRIGGERS = {
+    r'(?:\r?\n){3,}': ('\n\n', '\n\r\n'),
+    r'^.*?目\s{0,10}录.*$\n?': ('目',),
+    r'([^|])\n\|(.*?\|.*?\|.*?\n)': ('\n|',),
+    r'\|\n([^|])': ('|\n',),
+    r':(-{1,1000}):': (':-',),
+    r'</body></html> ': ('</body></html> ',),
+    r'<html><body>': ('<html><body>',),
+    r'\$\\rightarrow\$': ('$\\rightarrow$',),
+    r'\$\\leftarrow\$': ('$\\leftarrow$',),
+    r'\$=\$': ('$=$',),
+    r'\^': ('^',),
+    r'\$\+\$': ('$+$',),
+    r'\^\+': ('^+',),
+    r'\$\\mathrm\{([a-z])\}\$': ('$\\mathrm{',),
+    r'^\[([\u4e00-\u9fa5A-Za-z0-9]+)\]': ('[',),
+}
+# 合并后的标点规则：任一待替换的标点字符
+PUNCTUATION_TRIGGERS = tuple('（）「」【】．。，；：！？"\'')
+
+# 模块加载时预编译全部替换规则，避免每个文件重复编译；
+# 标点规则合并为一条，其余规则与顺序相关，保持逐条执行
+COMPILED_PATTERNS = []
+# 预编译规则 -> 触发子串，未登记的规则总是执行
+COMPILED_TRIGGERS = {}
+for _rule in patterns_and_replacements:
+    if _rule in PUNCTUATION_PATTERNS:
+        if _rule is PUNCTUATION_PATTERNS[0]:
+            COMPILED_PATTERNS.append(merge_patterns(PUNCTUATION_PATTERNS))
+            COMPILED_TRIGGERS[COMPILED_PATTERNS[-1][0]] = PUNCTUATION_TRIGGERS
+        continue
+    COMPILED_PATTERNS.append((re.compile(_rule[0], re.MULTILINE), _rule[1]))
+    if _rule[0] in RULE_TRIGGERS:
+        COMPILED_TRIGGERS[COMPILED_PATTERNS[-1][0]] = RULE_TRIGGERS[_rule[0]]
+del _rule
+
+def remove_empty_table_rows(text, lines=None):
+    """处理表格中的连续空行和首尾空行（lines 为调用方已切分好的 text.split('\\n')）"""
+    # 没有 '|' 就没有表格行，逐行处理后原样拼回，直接返回
+    if '|' not in text:
+        return text
+    if lines is None:
+        lines = text.split('\n')
     result = []
     table_lines = []
     in_table = False
@@ -436,15 +529,13 @@ def process_table(table_lines):
         return []
     
     original_length = len(table_lines)
-    logging.info(f"开始处理表格，原始行数: {original_length}")
+    logging.info("开始处理表格，原始行数: %d", original_length)
     
-    # 移除首尾的空行
-    while table_lines and is_empty_table_row(table_lines[0]):
-        logging.debug("移除表格首部空行")
-        table_lines.pop(0)
-    while table_lines and is_empty_table_row(table_lines[-1]):
-        logging.debug("移除表格尾部空行")
-        table_lines.pop()
+    # 用首尾下标跳过首尾的空行，避免反复 pop(0)
+    start = next((i for i, line in enumerate(table_lines) if not is_empty_table_row(line)), original_length)
+    end = original_length - next((i for i, line in enumerate(reversed(table_lines)) if not is_empty_table_row(line)), 0)
+    if logger.isEnabledFor(logging.DEBUG) and (start or end < original_length):
+        logger.debug("移除表格首部空行 %d 行, 尾部空行 %d 行", start, original_length - end)
     
     # 处理中间的连续空行和重复行
     result = []
@@ -453,7 +544,8 @@ def process_table(table_lines):
     removed_empty = 0
     removed_duplicate = 0
     
-    for line in table_lines:
+    for i in range(start, end):
+        line = table_lines[i]
         # 处理空行
         if is_empty_table_row(line):
             if not prev_empty:
@@ -467,26 +559,28 @@ def process_table(table_lines):
         # 处理重复行
         if line == prev_line:
             removed_duplicate += 1
-            logging.debug(f"移除重复行: {line}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("移除重复行: %s", line)
             continue
         
         result.append(line)
         prev_line = line
         prev_empty = False
     
-    logging.info(f"表格处理完成: 移除了 {removed_empty} 个连续空行, {removed_duplicate} 个重复行")
-    logging.info(f"表格行数变化: {original_length} -> {len(result)}")
+    logging.info("表格处理完成: 移除了 %d 个连续空行, %d 个重复行", removed_empty, removed_duplicate)
+    logging.info("表格行数变化: %d -> %d", original_length, len(result))
     return result
 
+# 空表格行：除首个 '|' 之前与最后一个 '|' 之后的部分外，各单元格均为空白（不含 '|' 的行也视为空）
+EMPTY_TABLE_ROW_PATTERN = re.compile(r'[^|]*(?:\|(?:\s*\|)*[^|]*)?')
+
+@lru_cache(maxsize=1024)
 def is_empty_table_row(line):
-    """检查是否是空的表格行"""
-    if not line.strip():
-        return True
-    parts = line.split('|')[1:-1]  # 去掉首尾的|
-    return all(cell.strip() == '' for cell in parts)
+    """检查是否是空的表格行（结果按行缓存，表格中重复的分隔行/空行只判断一次）"""
+    return EMPTY_TABLE_ROW_PATTERN.fullmatch(line) is not None
 
 
-def extract_and_process_headers(text, header_levels=None):
+def extract_and_process_headers(text, header_levels=None, lines=None):
     """
     提取并处理文档中的标题
     
@@ -494,6 +588,7 @@ def extract_and_process_headers(text, header_levels=None):
         text (str): 要处理的文本
         header_levels (list): 要处理的标题级别列表，例如[1,2,3,4,5,6]或[1,3,6]
                             如果为None，则默认处理所有标题级别(1-6)
+        lines (list): 调用方已切分好的 text.split('\\n')，为None时在此切分
     
     Returns:
         str: 处理后的文本
@@ -502,31 +597,44 @@ def extract_and_process_headers(text, header_levels=None):
     if header_levels is None:
         header_levels = [1, 2, 3, 4, 5, 6]
     
-    logging.info(f"提取标题，处理级别: {header_levels}")
+    logging.info("提取标题，处理级别: %s", header_levels)
     
-    lines = text.split('\n')
+    # 没有 '#' 就不可能有标题行，无需分行
+    if '#' not in text:
+        lines = ()
+    elif lines is None:
+        lines = text.split('\n')
     headers = []
     
     for line_num, line in enumerate(lines):
-        if line.startswith('#'):
-            level = 0
-            for char in line:
-                if char == '#':
-                    level += 1
-                else:
-                    break
-            
-            # 检查是否是有效的标题行(#后面有空格，且级别在指定范围内)
-            if level > 0 and level <= 6 and len(line) > level and line[level] == ' ':
-                if level in header_levels:
-                    header_text = line[level+1:].strip()
-                    headers.append((level, header_text, line_num))
-                    logging.debug(f"找到{level}级标题: {header_text}")
-    
-    logging.info(f"共提取了 {len(headers)} 个标题")
+        if not line.startswith('#'):
+            continue
+        # 检查是否是有效的标题行(#后面有空格，且级别在指定范围内)
+        m = HEADER_LINE_PATTERN.match(line)
+        if m:
+            level = m.end(1)
+            if level in header_levels:
+                header_text = m.group(2).strip()
+                headers.append((level, header_text, line_num))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("找到%d级标题: %s", level, header_text)
+    
+    logging.info("共提取了 %d 个标题", len(headers))
     return text, headers
 
-def process_headers_by_level(text, header_levels=None):
+# 标题级别与相应的正则表达式映射（模块加载时预编译；替换函数用 partial 绑定标题类型，不再逐条创建闭包）
+header_patterns_by_level = {
+    1: [(re.compile(r'^第([一二三四五六七八九十百千万零两]+)章(?:\s*)', re.MULTILINE), partial(convert_number, format_type='chapter'))],  # 一级标题: 章
+    2: [(re.compile(r'^第([一二三四五六七八九十百千万零两]+)节(?:\s*)', re.MULTILINE), partial(convert_number, format_type='section'))],  # 二级标题: 节
+    3: [(re.compile(r'^([一二三四五六七八九十百千万零两]+)、(?:\s*)', re.MULTILINE), partial(convert_number, format_type='subsection'))],  # 三级标题: 中文数字标题
+    4: [(re.compile(r'^\(([一二三四五六七八九十百千万零两]+)\)(?:\s*)', re.MULTILINE), partial(convert_number, format_type='subsubsection'))],  # 四级标题: 带括号的中文数字标题
+    5: [(re.compile(r'^(\d+)\.(?:\s*)', re.MULTILINE), partial(convert_number, format_type='number_title'))],  # 五级标题: 数字标题
+    6: [(re.compile(r'^(\d+\.\d+)\.(?:\s*)', re.MULTILINE), partial(convert_number, format_type='number_subtitle'))]  # 六级标题: 数字子标题
+}
+# 各级标题的每个匹配都必然包含的字符，文本中不含时跳过该级别的整篇正则扫描
+HEADER_TRIGGERS = {1: '章', 2: '节', 3: '、', 4: '(', 5: '.', 6: '.'}
+
+def process_headers_by_level(text, header_levels=None, file_stats=None):
     """
     根据指定的标题级别处理文档中的标题格式化
     
@@ -534,195 +642,364 @@ def process_headers_by_level(text, header_levels=None):
         text (str): 要处理的文本
         header_levels (list): 要处理的标题级别列表，例如[1,2,3,4,5,6]或[1,3,6]
                             如果为None，则默认处理所有标题级别(1-6)
+        file_stats (dict): 记录匹配次数的统计字典，为None时使用模块级 stats
     
     Returns:
         str: 处理后的文本
     """
     if header_levels is None:
         header_levels = [1, 2, 3, 4, 5, 6]
+    if file_stats is None:
+        file_stats = stats
     
-    logging.info(f"处理标题格式化，级别: {header_levels}")
-    
-    # 标题级别与相应的正则表达式映射
-    header_patterns_by_level = {
-        1: [(r'^第([一二三四五六七八九十百千万零两]+)章(?:\s*)', lambda m: convert_number(m, 'chapter'))],  # 一级标题: 章
-        2: [(r'^第([一二三四五六七八九十百千万零两]+)节(?:\s*)', lambda m: convert_number(m, 'section'))],  # 二级标题: 节
-        3: [(r'^([一二三四五六七八九十百千万零两]+)、(?:\s*)', lambda m: convert_number(m, 'subsection'))],  # 三级标题: 中文数字标题
-        4: [(r'^\(([一二三四五六七八九十百千万零两]+)\)(?:\s*)', lambda m: convert_number(m, 'subsubsection'))],  # 四级标题: 带括号的中文数字标题
-        5: [(r'^(\d+)\.(?:\s*)', lambda m: convert_number(m, 'number_title'))],  # 五级标题: 数字标题
-        6: [(r'^(\d+\.\d+)\.(?:\s*)', lambda m: convert_number(m, 'number_subtitle'))]  # 六级标题: 数字子标题
-    }
+    logging.info("处理标题格式化，级别: %s", header_levels)
     
     # 根据选择的标题级别应用对应的正则表达式
     for level in header_levels:
-        if level in header_patterns_by_level:
+        if level in header_patterns_by_level and HEADER_TRIGGERS[level] in text:
             for pattern, replacement in header_patterns_by_level[level]:
                 try:
-                    prev_text = text
-                    text = re.sub(pattern, replacement, text, flags=re.MULTILINE)
-                    # 检查是否有变化
-                    if prev_text != text:
-                        pattern_name = f"Level{level}_{pattern[:20]}..." if isinstance(pattern, str) else f"Level{level}_函数替换"
-                        stats["pattern_matches"][pattern_name] = stats["pattern_matches"].get(pattern_name, 0) + 1
-                        logging.info(f"应用 {level} 级标题替换规则: {pattern}")
+                    # subn 在同一次扫描中返回替换次数，无需再比较整篇文本
+                    text, count = pattern.subn(replacement, text)
+                    if count:
+                        pattern_name = f"Level{level}_{pattern.pattern[:20]}..."
+                        file_stats["pattern_matches"][pattern_name] += count
+                        logging.info("应用 %d 级标题替换规则: %s", level, pattern.pattern)
                 except Exception as e:
-                    logging.error(f"应用 {level} 级标题替换规则失败: {pattern}, 错误: {str(e)}")
+                    logging.error(f"应用 {level} 级标题替换规则失败: {pattern.pattern}, 错误: {str(e)}")
     
     return text
 
-def process_text(text, patterns_and_replacements):
-    """处理文本的核心函数"""
-    logging.info("开始处理文本")
-    formatter = TextFormatter()
-    
+# 未指定标题级别时处理全部级别
+ALL_HEADER_LEVELS = [1, 2, 3, 4, 5, 6]
+
+def parse_header_levels(header_levels_input):
+    """解析标题级别输入，如"1-6"、"1,3,6"、"1-3,5"，无效输入返回默认值[1-6]"""
+    if not header_levels_input:
+        return list(ALL_HEADER_LEVELS)
     try:
-        # 询问用户要处理哪几级标题
-        try:
-            header_levels_input = Prompt.ask(
-                "请输入要处理的标题级别(多个级别用逗号分隔，如1,2,3，默认处理所有标题级别1-6)", 
-                default="1-6"
-            )
-            
-            # 解析用户输入的标题级别
-            if header_levels_input:
-                try:
-                    header_levels = []
-                    for part in header_levels_input.split(','):
-                        part = part.strip()
-                        if '-' in part:
-                            # 处理范围，如"1-3"
-                            start, end = map(int, part.split('-'))
-                            header_levels.extend(range(start, end + 1))
-                        else:
-                            # 处理单个数字
-                            header_levels.append(int(part))
-                    
-                    # 确保标题级别在1-6的范围内
-                    header_levels = [level for level in header_levels if 1 <= level <= 6]
-                    # 去重并排序
-                    header_levels = sorted(set(header_levels))
-                    
-                    if not header_levels:
-                        header_levels = [1, 2, 3, 4, 5, 6]
-                        logging.warning("无效的标题级别输入，使用默认值[1-6]")
-                    else:
-                        logging.info(f"将处理标题级别: {header_levels}")
-                except ValueError:
-                    header_levels = [1, 2, 3, 4, 5, 6]
-                    logging.warning(f"无法解析输入 '{header_levels_input}'，使用默认值[1-6]")
+        header_levels = []
+        for part in header_levels_input.split(','):
+            part = part.strip()
+            if '-' in part:
+                # 处理范围，如"1-3"
+                start, end = map(int, part.split('-'))
+                header_levels.extend(range(start, end + 1))
             else:
-                header_levels = [1, 2, 3, 4, 5, 6]
-        except Exception as e:
-            header_levels = [1, 2, 3, 4, 5, 6]
-            logging.error(f"询问标题级别时出错: {str(e)}，使用默认值[1-6]")
+                # 处理单个数字
+                header_levels.append(int(part))
+        
+        # 确保标题级别在1-6的范围内
+        header_levels = [level for level in header_levels if 1 <= level <= 6]
+        # 去重并排序
+        header_levels = sorted(set(header_levels))
         
+        if not header_levels:
+            logging.warning("无效的标题级别输入，使用默认值[1-6]")
+            return list(ALL_HEADER_LEVELS)
+        logging.info(f"将处理标题级别: {header_levels}")
+        return header_levels
+    except ValueError:
+        logging.warning(f"无法解析输入 '{header_levels_input}'，使用默认值[1-6]")
+        return list(ALL_HEADER_LEVELS)
+
+def ask_header_levels():
+    """询问用户要处理哪几级标题，解析失败时返回默认值[1-6]"""
+    try:
+        header_levels_input = Prompt.ask(
+            "请输入要处理的标题级别(多个级别用逗号分隔，如1,2,3，默认处理所有标题级别1-6)", 
+            default="1-6"
+        )
+    except Exception as e:
+        logging.error(f"询问标题级别时出错: {str(e)}，使用默认值[1-6]")
+        return list(ALL_HEADER_LEVELS)
+    return parse_header_levels(header_levels_input)
+
+def resolve_header_levels(header_levels_input=None):
+    """
+    确定本次运行要处理的标题级别：优先使用命令行参数，
+    其次在交互终端中询问一次，非交互环境下处理全部级别
+    """
+    if header_levels_input:
+        return parse_header_levels(header_levels_input)
+    if sys.stdin is not None and sys.stdin.isatty():
+        return ask_header_levels()
+    return list(ALL_HEADER_LEVELS)
+
+# 格式化器不保存逐次调用的状态，模块内共用一个实例，无需每块文本重新构造
+_FORMATTER = TextFormatter()
+
+def transform_text(text, patterns_and_replacements, header_levels, file_stats=None):
+    """按给定的标题级别对文本应用全部格式化与替换规则，统计写入 file_stats（默认模块级 stats）"""
+    formatter = _FORMATTER
+    if file_stats is None:
+        file_stats = stats
+    
+    try:
         # 先进行基础文本格式化
         logging.info("进行基础文本格式化")
         text = formatter.format_text(text)
-        stats["format_changes"] += 1
+        file_stats["format_changes"] += 1
+        
+        # 标题提取不改变文本，两步都需要逐行处理时共用同一次分行结果
+        lines = text.split('\n') if '#' in text and '|' in text else None
         
         # 提取和处理标题
-        text, headers = extract_and_process_headers(text, header_levels)
+        text, headers = extract_and_process_headers(text, header_levels, lines)
         if headers:
-            logging.info(f"成功提取{len(headers)}个标题")
+            logging.info("成功提取%d个标题", len(headers))
             # 这里可以添加更多对标题的处理逻辑
         
         # 处理表格空行和重复行
         logging.info("处理表格空行和重复行")
-        text = remove_empty_table_rows(text)
+        text = remove_empty_table_rows(text, lines)
         
         # 再应用其他替换规则
         logging.info("应用替换规则")
         for pattern, replacement in patterns_and_replacements:
             try:
-                if callable(replacement):
-                    # 记录替换前的文本
-                    prev_text = text
-                    text = re.sub(pattern, replacement, text, flags=re.MULTILINE)
-                    # 检查是否有变化
-                    if prev_text != text:
-                        pattern_name = pattern if isinstance(pattern, str) else "函数替换"
-                        stats["pattern_matches"][pattern_name] = stats["pattern_matches"].get(pattern_name, 0) + 1
-                else:
-                    prev_text = text
-                    text = re.sub(pattern, replacement, text, flags=re.MULTILINE)
-                    if prev_text != text:
-                        pattern_name = pattern if isinstance(pattern, str) else "函数替换"
-                        stats["pattern_matches"][pattern_name] = stats["pattern_matches"].get(pattern_name, 0) + 1
-                logging.debug(f"成功应用替换规则: {pattern}")
+                # 支持预编译规则 (COMPILED_PATTERNS) 与原始字符串规则
+                if isinstance(pattern, str):
+                    pattern = re.compile(pattern, re.MULTILINE)
+                # 文本中不含任何触发子串时该规则不可能匹配，直接跳过
+                triggers = COMPILED_TRIGGERS.get(pattern)
+                if triggers and not any(t in text for t in triggers):
+                    continue
+                # subn 在同一次扫描中返回替换次数，无需再比较整篇文本
+                text, count = pattern.subn(replacement, text)
+                if count:
+                    file_stats["pattern_matches"][pattern.pattern] += count
+                logging.debug("成功应用替换规则: %s", pattern.pattern)
             except Exception as e:
-                logging.error(f"应用替换规则失败: {pattern}, 错误: {str(e)}")
+                logging.error(f"应用替换规则失败: {getattr(pattern, 'pattern', pattern)}, 错误: {str(e)}")
                 continue
         
         # 根据用户选择的标题级别处理标题格式化
-        text = process_headers_by_level(text, header_levels)
+        text = process_headers_by_level(text, header_levels, file_stats)
         
-        logging.info("文本处理完成")
         return text
     except Exception as e:
         logging.error(f"处理文本时发生错误: {str(e)}")
         return text  # 返回原文本
 
-def process_file(file_path):
-    """处理单个文件"""
+def process_text(text, patterns_and_replacements, header_levels=None):
+    """处理文本的核心函数，header_levels 为None时处理全部标题级别"""
+    logging.info("开始处理文本")
+    if header_levels is None:
+        header_levels = ALL_HEADER_LEVELS
+    text = transform_text(text, patterns_and_replacements, header_levels)
+    logging.info("文本处理完成")
+    return text
+
+# 流式处理时每块的目标字符数
+CHUNK_SIZE = 256 * 1024
+# 读写缓冲区上限：按文件大小分配，小文件一次系统调用读完，大文件不超过该上限
+MAX_IO_BUFFER = 1024 * 1024
+
+# 切块时行内不能出现的字符：'|' 表格行、'目'/'录' 目录行（可能被整行删除或与相邻行组成匹配）、
+# '<' HTML 标签（删除后可能留下空行）
+_CHUNK_UNSAFE_CHARS = ('|', '目', '录', '<')
+# 行尾为这些字符时可能是仅含编号的标题（含转换前的全角标点），其 \\s* 会吞掉后续换行
+_HEADER_END_CHARS = '章节、).）．。'
+
+def is_chunk_boundary(prev_line, next_line):
+    """
+    判断能否在 prev_line 与 next_line 之间切块。
+    跨行的规则（连续空行、目录行、表格前后空行、表格空行/重复行、
+    标题正则中的 \\s*）都不会越过满足以下条件的行边界，
+    因此逐块处理与整篇处理的结果完全一致：
+      - 两行都不含 _CHUNK_UNSAFE_CHARS 中的字符
+      - 上一行含非空白字符，且末尾不是 _HEADER_END_CHARS 中的字符
+      - 下一行以非空白字符开头
+    """
+    prev_stripped = prev_line.rstrip()
+    return (
+        prev_stripped != ''
+        and prev_stripped[-1] not in _HEADER_END_CHARS
+        and next_line[:1] != ''
+        and not next_line[:1].isspace()
+        and not any(c in prev_line or c in next_line for c in _CHUNK_UNSAFE_CHARS)
+    )
+
+def iter_chunks(file, chunk_size=CHUNK_SIZE):
+    """按行读取文件，累计约 chunk_size 字符后在安全行边界处切出一块"""
+    buf = []
+    size = 0
+    prev_line = None
+    for line in file:
+        if size >= chunk_size and is_chunk_boundary(prev_line, line):
+            yield ''.join(buf)
+            buf = []
+            size = 0
+        buf.append(line)
+        size += len(line)
+        prev_line = line
+    if buf:
+        yield ''.join(buf)
+
+def copy_prefix(file_path, dst, length):
+    """将原文件的前 length 个字符（按文本模式读取）分块复制到 dst"""
+    with open(file_path, 'r', encoding='utf-8') as src:
+        while length > 0:
+            data = src.read(min(length, CHUNK_SIZE))
+            if not data:
+                break
+            dst.write(data)
+            length -= len(data)
+
+def process_file(file_path, header_levels=None):
+    """
+    处理单个文件（分块流式处理，结果写入临时文件后原子替换原文件）
+    
+    除文件读写外不修改模块级状态，可直接在子进程中执行。
+    
+    Args:
+        file_path (str): 要处理的文件路径
+        header_levels (list): 要处理的标题级别，为None时处理全部级别
+    
+    Returns:
+        dict: 本文件的统计，处理失败时返回None
+    """
+    # 本文件的输出先收集起来，处理结束后一次写出：减少写 stdout 的次数，
+    # 并行处理时各文件的输出也不会相互穿插
+    name = os.path.basename(file_path)
+    out = [f"{Fore.CYAN}处理文件: {name}{Style.RESET_ALL}"]
     try:
-        print(f"{Fore.CYAN}处理文件: {os.path.basename(file_path)}{Style.RESET_ALL}")
-        
-        # 读取文件内容
-        with open(file_path, 'r', encoding='utf-8') as file:
-            text = file.read()
-        original_length = len(text)
-        logging.info(f"成功读取文件，字符数: {original_length}")
+        if header_levels is None:
+            header_levels = ALL_HEADER_LEVELS
+        file_stats = new_stats()
+        original_length = 0
+        new_length = 0
         
-        # 处理文本
+        # 逐块读取、处理并写入同目录下的临时文件，避免整篇文档及其副本同时驻留内存；
+        # 临时文件在首个发生变化的块出现时才创建，内容无变化的文件不会产生任何写入
         start_time = time.time()
-        processed_text = process_text(text, patterns_and_replacements)
+        # 解析符号链接：临时文件建在真实文件旁并替换真实文件，链接本身保持不变
+        real_path = os.path.realpath(file_path)
+        dst = None
+        tmp_path = None
+        unchanged_length = 0
+        buffer_size = min(max(os.path.getsize(file_path), io.DEFAULT_BUFFER_SIZE), MAX_IO_BUFFER)
+        try:
+            with open(file_path, 'r', encoding='utf-8', buffering=buffer_size) as src:
+                for chunk in iter_chunks(src):
+                    original_length += len(chunk)
+                    processed = transform_text(chunk, COMPILED_PATTERNS, header_levels, file_stats)
+                    new_length += len(processed)
+                    if dst is None:
+                        if processed == chunk:
+                            unchanged_length += len(chunk)
+                            continue
+                        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(real_path)}.", suffix='.tmp',
+                                                        dir=os.path.dirname(real_path))
+                        dst = open(fd, 'w', encoding='utf-8', buffering=buffer_size)
+                        copy_prefix(real_path, dst, unchanged_length)
+                    dst.write(processed)
+            if dst is not None:
+                dst.close()
+                shutil.copymode(real_path, tmp_path)
+                os.replace(tmp_path, real_path)
+        except BaseException:
+            if dst is not None:
+                dst.close()
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
         end_time = time.time()
+        logging.info("成功处理文件，字符数: %d", original_length)
         
         # 更新统计
-        stats["processed_files"] += 1
-        stats["total_chars_processed"] += original_length
-        
-        # 写回文件
-        with open(file_path, 'w', encoding='utf-8') as file:
-            file.write(processed_text)
+        file_stats["processed_files"] += 1
+        if dst is not None:
+            file_stats["changed_files"] += 1
+        file_stats["total_chars_processed"] += original_length
         
-        new_length = len(processed_text)
         char_diff = new_length - original_length
         diff_str = f"{char_diff:+d}" if char_diff != 0 else "0"
         
-        print(f"{Fore.GREEN}完成: {os.path.basename(file_path)} ")
-        print(f"  - 处理耗时: {end_time - start_time:.2f}秒")
-        print(f"  - 文件大小: {original_length} → {new_length} ({diff_str}字符)")
-        print(f"  - 应用规则: {sum(stats['pattern_matches'].values())}次匹配{Style.RESET_ALL}")
+        out.append(f"{Fore.GREEN}完成: {name} {'' if dst is not None else '(内容无变化，未写回)'}")
+        out.append(f"  - 处理耗时: {end_time - start_time:.2f}秒")
+        out.append(f"  - 文件大小: {original_length} → {new_length} ({diff_str}字符)")
+        out.append(f"  - 应用规则: {sum(file_stats['pattern_matches'].values())}次匹配{Style.RESET_ALL}")
         
-        return True
+        return file_stats
     except Exception as e:
         logging.error(f"处理文件失败: {file_path}", exc_info=True)
-        print(f"{Fore.RED}处理失败: {str(e)}{Style.RESET_ALL}")
-        return False
+        out.append(f"{Fore.RED}处理失败: {str(e)}{Style.RESET_ALL}")
+        return None
+    finally:
+        print('\n'.join(out), flush=True)
+
+# 持久化缓存名称（~/.glowtoolbox/cache/contents_replacer.json）
+CACHE_NAME = "contents_replacer"
+
+def cache_signature(header_levels):
+    """缓存签名：标题级别 + 脚本源码摘要（规则或转换逻辑有改动时已有缓存自动失效）"""
+    return json.dumps([list(header_levels), source_digest(__file__)])
+
+def process_files(md_files, header_levels=None, max_workers=None, use_cache=False):
+    """
+    并行处理多个文件，并将各文件的统计合并到模块级 stats
+    
+    md_files 可以是列表或惰性生成器（边扫描边处理）。
+    标题级别由调用方（main）确定后传入各子进程，为None时处理全部级别。
+    
+    use_cache 为 True 时使用持久化缓存：只登记处理后内容没有变化的文件，
+    再次运行时 mtime、大小与签名均未变化的文件其处理结果必然仍是原样，直接跳过读取与转换。
+    """
+    if header_levels is None:
+        header_levels = ALL_HEADER_LEVELS
+    
+    cache = load_cache(CACHE_NAME) if use_cache else {}
+    signature = cache_signature(header_levels) if use_cache else None
+    # 已交给处理的文件及其处理前的 (mtime_ns, 大小)，与结果按顺序一一对应
+    pending_entries = []
+    
+    def _pending(paths):
+        for file_path in paths:
+            if use_cache:
+                key = os.path.abspath(file_path)
+                st = os.stat(file_path)
+                entry = [st.st_mtime_ns, st.st_size, signature]
+                if cache.get(key) == entry:
+                    continue
+                pending_entries.append((key, entry))
+            yield file_path
+    
+    def _collect(results):
+        for i, file_stats in enumerate(results):
+            if file_stats:
+                merge_stats(stats, file_stats)
+            if not use_cache:
+                continue
+            key, entry = pending_entries[i]
+            if file_stats and not file_stats["changed_files"]:
+                cache[key] = entry
+            else:
+                cache.pop(key, None)
+    
+    if (isinstance(md_files, list) and len(md_files) == 1) or max_workers == 1:
+        _collect(process_file(file_path, header_levels) for file_path in _pending(md_files))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            _collect(executor.map(process_file, _pending(md_files), repeat(header_levels), chunksize=4))
+    
+    if use_cache:
+        save_cache(CACHE_NAME, cache)
 
-def process_directory(directory_path):
+def process_directory(directory_path, header_levels=None, use_cache=False):
     """处理目录中的所有 Markdown 文件"""
     print(f"{Fore.CYAN}扫描目录: {directory_path}{Style.RESET_ALL}")
-    md_files = []
-    
-    # 查找所有 Markdown 文件
-    for root, _, files in os.walk(directory_path):
-        for file in files:
-            if file.lower().endswith('.md'):
-                md_files.append(os.path.join(root, file))
     
-    if not md_files:
+    # 惰性查找 Markdown 文件，只预取第一个以判断目录是否为空
+    md_files = iter_md_files(directory_path)
+    first = next(md_files, None)
+    if first is None:
         print(f"{Fore.YELLOW}警告: 目录中没有找到 Markdown 文件{Style.RESET_ALL}")
         return
     
-    print(f"{Fore.GREEN}找到 {len(md_files)} 个 Markdown 文件待处理{Style.RESET_ALL}")
-    
-    # 处理每个文件
-    for i, file_path in enumerate(md_files):
-        print(f"\n{Fore.CYAN}[{i+1}/{len(md_files)}] 处理文件: {os.path.basename(file_path)}{Style.RESET_ALL}")
-        process_file(file_path)
+    # 各文件相互独立，扫描与处理重叠进行，交给进程池并行处理
+    process_files(chain([first], md_files), header_levels, use_cache=use_cache)
     
     # 显示总结
     print(f"\n{Fore.GREEN}===== 处理完成 ====={Style.RESET_ALL}")
@@ -733,7 +1010,7 @@ def process_directory(directory_path):
     # 显示各种模式的匹配次数
     if stats["pattern_matches"]:
         print(f"\n{Fore.CYAN}替换规则统计:{Style.RESET_ALL}")
-        for pattern, count in sorted(stats["pattern_matches"].items(), key=lambda x: x[1], reverse=True):
+        for pattern, count in stats["pattern_matches"].most_common():
             if isinstance(pattern, str) and len(pattern) > 50:
                 pattern_display = pattern[:47] + "..."
             else:
@@ -745,6 +1022,8 @@ def main():
     parser.add_argument('--path', help='要处理的文件或目录路径')
     parser.add_argument('-c', '--clipboard', action='store_true', help='从剪贴板读取路径')
     parser.add_argument('-r', '--recursive', action='store_true', help='递归处理目录')
+    parser.add_argument('--levels', help='要处理的标题级别，如 1-6 或 1,3,6（未指定时在终端中询问一次）')
+    parser.add_argument('--cache', action='store_true', help='跳过上次处理后无变化且未被修改的文件')
     args = parser.parse_args()
     
     try:
@@ -771,16 +1050,18 @@ def main():
                 print(f"{Fore.YELLOW}将使用当前目录: {current_dir}{Style.RESET_ALL}")
                 path = current_dir
         
+        # 标题级别只确定一次，再传给每个文件的处理
+        header_levels = resolve_header_levels(args.levels)
+        
         # 处理文件或目录
         if os.path.isfile(path):
-            process_file(path)
+            process_files([path], header_levels, use_cache=args.cache)
         elif os.path.isdir(path):
             if args.recursive:
-                process_directory(path)
+                process_directory(path, header_levels, use_cache=args.cache)
             else:
                 # 只处理目录下的MD文件，不递归
-                md_files = [os.path.join(path, f) for f in os.listdir(path) 
-                           if f.lower().endswith('.md') and os.path.isfile(os.path.join(path, f))]
+                md_files = list(iter_md_files(path, recursive=False))
                 
                 if not md_files:
                     print(f"{Fore.YELLOW}警告: 目录中没有找到 Markdown 文件{Style.RESET_ALL}")
@@ -788,9 +1069,7 @@ def main():
                 
                 print(f"{Fore.GREEN}找到 {len(md_files)} 个 Markdown 文件待处理{Style.RESET_ALL}")
                 
-                for i, file_path in enumerate(md_files):
-                    print(f"\n{Fore.CYAN}[{i+1}/{len(md_files)}] 处理文件: {os.path.basename(file_path)}{Style.RESET_ALL}")
-                    process_file(file_path)
+                process_files(md_files, header_levels, use_cache=args.cache)
                 
                 # 显示总结
                 print(f"\n{Fore.GREEN}===== 处理完成 ====={Style.RESET_ALL}")
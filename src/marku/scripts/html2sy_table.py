@@ -1,14 +1,32 @@
-import re
 import os
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from lxml import etree
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Tuple
 from rich.console import Console
 from rich.panel import Panel
 from rich import print as rprint
 
+from .md_files import iter_md_files, read_text
+
 console = Console()
 
+# HTML 解析器可在多次解析间复用，模块加载时创建一次
+# huge_tree 取消超长文本节点的解析上限；注释与处理指令不参与文本提取，解析时直接丢弃；
+# 不需要按 id 查找元素，关闭 id 表；禁止网络访问
+_HTML_PARSER = etree.HTMLParser(recover=True, remove_blank_text=False, huge_tree=True,
+                                remove_comments=True, remove_pis=True, collect_ids=False,
+                                no_network=True)
+# XPath 表达式预编译，避免每行重新解析
+# 均相对传入的元素求值，同一文档中的多个表格互不影响
+_XP_TR = etree.XPath('.//tr')
+_XP_CELLS = etree.XPath('./th|./td')
+# 批量解析时各表格片段在合并文档中的位置
+_XP_BATCH_TABLES = etree.XPath('./body/div/table')
+# string() 由 libxml2 一次拼接全部后代文本，省去 itertext 逐节点产出再 join
+_XP_TEXT = etree.XPath('string()', smart_strings=False)
+
 def convert_html_table_to_markdown(html_table: str) -> str:
     """将HTML表格转换为思源笔记兼容的Markdown表格
     
@@ -19,23 +37,25 @@ def convert_html_table_to_markdown(html_table: str) -> str:
         转换后的Markdown表格
     """
     # 解析 HTML 表格
-    separator_added = True
-    parser = etree.HTMLParser()
     try:
-        root = etree.fromstring(html_table, parser)
+        root = etree.fromstring(html_table, _HTML_PARSER)
     except etree.XMLSyntaxError as e:
         console.print(f"[bold red]解析HTML出错:[/] {str(e)}")
         return f"解析HTML出错: {str(e)}"
     
+    return _table_to_markdown(root)
+
+def _table_to_markdown(root) -> str:
+    """将已解析的表格（或包含它的文档根元素）转换为 Markdown 表格"""
     # 获取所有行
-    all_trs = root.xpath('//tr')
+    all_trs = _XP_TR(root)
     
     if all_trs:
         row_num = len(all_trs)
         col_num = 0
         
         # 计算最大列数
-        for td in all_trs[0].xpath('./th|./td'):
+        for td in _XP_CELLS(all_trs[0]):
             col_num += int(td.get('colspan', 1))
         
         # 创建一个二维列表来存放表格数据
@@ -46,104 +66,166 @@ def convert_html_table_to_markdown(html_table: str) -> str:
         
         # 逐行解析表格
         for r in range(row_num):
+            row = table_data[r]
             c = 0
-            for td in all_trs[r].xpath('./th|./td'):
-                gap = 0
-                
+            for td in _XP_CELLS(all_trs[r]):
                 row_span = int(td.get('rowspan', 1))
                 col_span = int(td.get('colspan', 1))
                 
-                # 使用 itertext() 获取文本内容
-                content = ''.join(td.itertext()).replace('\n', '<br />')
+                # 获取单元格全部文本；无换行时跳过 replace
+                content = _XP_TEXT(td)
+                if '\n' in content:
+                    content = content.replace('\n', '<br />')
                 
-                # 确保不会超出当前行的边界
-                while c + gap < len(table_data[r]) and table_data[r][c + gap] == empty_data:
-                    gap += 1
+                # 跳过被上方合并单元格占用的列；c 只前进不回退，整行的扫描总量为 O(列数)
+                while c < col_num and row[c] == empty_data:
+                    c += 1
                 
                 if row_span == 1 and col_span == 1:
-                    if c + gap < len(table_data[r]):
-                        table_data[r][c + gap] = content
+                    if c < col_num:
+                        row[c] = content
                 else:
-                    for i in range(row_span):
-                        for j in range(col_span):
-                            if r + i < len(table_data) and c + gap + j < len(table_data[r + i]):
-                                table_data[r + i][c + gap + j] = empty_data
-                    if c + gap < len(table_data[r]):
-                        table_data[r][c + gap] = f"{{: colspan='{col_span}' rowspan='{row_span}'}}" + content
+                    # 被合并覆盖的单元格：每行一次切片赋值，代替逐格写入
+                    width = min(c + col_span, col_num) - c
+                    if c >= 0 and width > 0:
+                        fill = [empty_data] * width
+                        for i in range(r, min(r + row_span, row_num)):
+                            table_data[i][c:c + width] = fill
+                    if c < col_num:
+                        row[c] = f"{{: colspan='{col_span}' rowspan='{row_span}'}}" + content
                 
-                c += gap + col_span
+                c += col_span
         
         # 将数组中的数据组合成 Markdown 表格模板
-        template_str = ""
-        for r in range(row_num):
-            template_str += '|'
-            for c in range(col_num):
-                template_str += ' ' + table_data[r][c] + ' |'
-            template_str += '\n'
-            
-            # 添加分隔线在表头行之后或第一行之后
-            if (r == 0 or (r == 1 and len(root.xpath('//thead/tr')) > 0)) and separator_added == True:
-                template_str += '|' + '|'.join([' --- ' for _ in range(col_num)]) + '|\n'
-                separator_added = False
+        # 先生成各行片段，最后一次拼接，避免字符串反复累加
+        if col_num:
+            parts = ['| ' + ' | '.join(row) + ' |\n' for row in table_data]
+        else:
+            parts = ['|\n'] * row_num
+        
+        # 分隔线只生成一次，固定放在第一行（表头行）之后
+        parts.insert(1, '|' + '|'.join([' --- '] * col_num) + '|\n')
         
-        return template_str
+        return ''.join(parts)
     else:
         console.print("[bold yellow]警告:[/] 未找到表格")
         return "未找到表格"
 
-def replace_html_tables_with_markdown(filename: str) -> Tuple[int, List[str]]:
+def _iter_tables(content: str) -> Iterator[Tuple[int, int]]:
+    """单次向前扫描查找 HTML 表格，依次返回每个表格的 (起始, 结束) 位置
+    
+    与 re.findall(r'<table.*?>.*?</table>', content, re.DOTALL) 的匹配结果一致，
+    但只用 str.find 前进，不回溯。
+    """
+    pos = 0
+    while True:
+        start = content.find('<table', pos)
+        if start < 0:
+            return
+        tag_end = content.find('>', start + 6)
+        if tag_end < 0:
+            return
+        end = content.find('</table>', tag_end + 1)
+        if end < 0:
+            return
+        end += len('</table>')
+        yield start, end
+        pos = end
+
+# 文件中表格数达到该值时，合并为一个文档一次解析，省去逐个表格调用解析器的开销
+BATCH_PARSE_MIN_TABLES = 8
+
+def _parse_tables(html_tables: List[str]) -> Optional[list]:
+    """将多个表格片段合并为一个文档一次解析，返回与片段一一对应的 table 元素
+    
+    若片段标签不完整导致表格之间相互嵌套或合并，解析出的表格数与片段数不一致，
+    此时返回 None，由调用方逐个解析。
+    """
+    try:
+        root = etree.fromstring('<div>' + ''.join(html_tables) + '</div>', _HTML_PARSER)
+    except etree.XMLSyntaxError:
+        return None
+    if root is None:
+        return None
+    tables = _XP_BATCH_TABLES(root)
+    return tables if len(tables) == len(html_tables) else None
+
+def replace_html_tables_with_markdown(filename: str, verbose: bool = True) -> Tuple[int, List[str]]:
     """替换文件中的HTML表格为Markdown表格
     
     Args:
         filename: 要处理的文件名
+        verbose: 是否输出逐文件、逐表格的进度信息（错误信息始终输出）
         
     Returns:
         元组，包含替换的表格数量和错误消息列表
     """
-    console.print(f"[bold blue]处理文件:[/] {filename}")
+    if verbose:
+        console.print(f"[bold blue]处理文件:[/] {filename}")
     
     if not os.path.exists(filename):
         console.print(f"[bold red]错误:[/] 文件 {filename} 不存在")
         return 0, [f"文件 {filename} 不存在"]
     
     try:
-        with open(filename, 'r', encoding='utf-8') as file:
-            content = file.read()
+        content = read_text(filename, b'<table')
     except Exception as e:
         console.print(f"[bold red]读取文件出错:[/] {str(e)}")
         return 0, [f"读取文件出错: {str(e)}"]
     
+    if content is None:
+        if verbose:
+            console.print("[yellow]未找到HTML表格[/]")
+        return 0, []
+    
     # 替换HTML标签
     content = content.replace('</body></html>', '').replace('<html><body>', '')
 
     # 查找所有的 HTML 表格
-    html_tables = re.findall(r'<table.*?>.*?</table>', content, re.DOTALL)
-    count = len(html_tables)
+    spans = list(_iter_tables(content))
+    count = len(spans)
     
     if count == 0:
-        console.print("[yellow]未找到HTML表格[/]")
+        if verbose:
+            console.print("[yellow]未找到HTML表格[/]")
         return 0, []
     
-    console.print(f"[green]找到 {count} 个HTML表格[/]")
+    if verbose:
+        console.print(f"[green]找到 {count} 个HTML表格[/]")
     errors = []
     
-    # 为每一个 HTML 表格生成 Markdown 表格并替换
-    for i, html_table in enumerate(html_tables):
+    html_tables = [content[start:end] for start, end in spans]
+    elements = _parse_tables(html_tables) if count >= BATCH_PARSE_MIN_TABLES else None
+    
+    # 为每一个 HTML 表格生成 Markdown 表格，与表格之间的原文依次拼接，避免逐个 str.replace 重扫全文
+    parts = []
+    pos = 0
+    for i, (start, end) in enumerate(spans):
+        html_table = html_tables[i]
+        parts.append(content[pos:start])
         try:
-            markdown_table = convert_html_table_to_markdown(html_table)
-            content = content.replace(html_table, markdown_table)
-            console.print(f"[green]✓[/] 表格 {i+1}/{count} 转换成功")
+            if elements is not None:
+                parts.append(_table_to_markdown(elements[i]))
+            else:
+                parts.append(convert_html_table_to_markdown(html_table))
+            if verbose:
+                console.print(f"[green]✓[/] 表格 {i+1}/{count} 转换成功")
         except Exception as e:
+            parts.append(html_table)
             error_msg = f"表格 {i+1}/{count} 转换失败: {str(e)}"
             console.print(f"[bold red]✗[/] {error_msg}")
             errors.append(error_msg)
+        pos = end
+    parts.append(content[pos:])
+    content = ''.join(parts)
 
     try:
         # 写入更新后的内容到文件
         with open(filename, 'w', encoding='utf-8') as file:
             file.write(content)
-        console.print(Panel(f"[bold green]成功替换 {count-len(errors)}/{count} 个HTML表格[/]", 
-                          title="处理完成", border_style="green"))
+        if verbose:
+            console.print(Panel(f"[bold green]成功替换 {count-len(errors)}/{count} 个HTML表格[/]", 
+                              title="处理完成", border_style="green"))
     except Exception as e:
         console.print(f"[bold red]写入文件出错:[/] {str(e)}")
         errors.append(f"写入文件出错: {str(e)}")
@@ -151,12 +233,17 @@ def replace_html_tables_with_markdown(filename: str) -> Tuple[int, List[str]]:
     
     return count, errors
 
-def process_directory(directory: str, recursive: bool = False) -> Tuple[int, int]:
+def process_directory(directory: str, recursive: bool = False, verbose: bool = False,
+                      max_workers: Optional[int] = None) -> Tuple[int, int]:
     """处理目录中的所有.md文件
     
+    各文件相互独立，默认用进程池并行处理；verbose 时改为串行，保证输出顺序可读。
+    
     Args:
         directory: 要处理的目录
         recursive: 是否递归处理子目录
+        verbose: 是否输出逐文件的进度信息，默认只在结束时输出汇总
+        max_workers: 并行进程数，None 为 CPU 核数，1 为串行
         
     Returns:
         元组，包含处理的文件数和表格数
@@ -170,17 +257,17 @@ def process_directory(directory: str, recursive: bool = False) -> Tuple[int, int
     total_files = 0
     total_tables = 0
     
-    for item in os.listdir(directory):
-        full_path = os.path.join(directory, item)
-        
-        if os.path.isfile(full_path) and full_path.lower().endswith('.md'):
-            count, _ = replace_html_tables_with_markdown(full_path)
+    md_files = iter_md_files(directory, recursive)
+    if verbose or max_workers == 1:
+        for count, _ in map(replace_html_tables_with_markdown, md_files, repeat(verbose)):
+            total_tables += count
+            total_files += 1
+        return total_files, total_tables
+    
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        for count, _ in executor.map(replace_html_tables_with_markdown, md_files, repeat(False), chunksize=8):
             total_tables += count
             total_files += 1
-        elif os.path.isdir(full_path) and recursive:
-            files, tables = process_directory(full_path, recursive)
-            total_files += files
-            total_tables += tables
     
     return total_files, total_tables
 
@@ -190,6 +277,8 @@ def main():
     parser.add_argument('path', nargs='?', default=None, help='要处理的文件或目录路径')
     parser.add_argument('-r', '--recursive', action='store_true', help='递归处理子目录')
     parser.add_argument('-d', '--demo', action='store_true', help='运行演示，处理当前目录下的1.md文件')
+    parser.add_argument('-v', '--verbose', action='store_true', help='处理目录时输出逐文件的详细信息')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='处理目录时的并行进程数（默认CPU核数）')
     
     args = parser.parse_args()
     
@@ -203,7 +292,7 @@ def main():
         return
     
     if os.path.isdir(path):
-        files, tables = process_directory(path, args.recursive)
+        files, tables = process_directory(path, args.recursive, args.verbose, args.workers)
         console.print(Panel(f"[bold green]共处理了 {files} 个文件，替换了 {tables} 个HTML表格[/]", 
                           title="处理完成", border_style="green"))
     elif os.path.isfile(path):
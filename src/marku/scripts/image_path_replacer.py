@@ -1,14 +1,35 @@
 import re
 import os
 import argparse
-from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from typing import List, Optional, Tuple
 from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Prompt, Confirm
 from rich import print as rprint
 import sys
+
+from .md_files import iter_md_files, read_text
+
 console = Console()
 
+@lru_cache(maxsize=32)
+def _image_pattern(relative_path_pattern: str) -> "re.Pattern":
+    """按相对路径模式编译图片匹配正则，同一模式在多个文件间只编译一次"""
+    # 转义相对路径模式中的特殊字符，以便在正则表达式中使用
+    escaped_pattern = re.escape(relative_path_pattern)
+    
+    # 构造匹配模式：![任意文本](相对路径模式任意路径)，相对路径模式为字面量，只捕获其后的部分
+    return re.compile(fr'!\[(.*?)\]\({escaped_pattern}([^)]+)\)')
+
+@lru_cache(maxsize=32)
+def _image_template(base_url: str) -> str:
+    """构造替换模板：替换由 re 引擎直接按模板展开，无需逐个匹配回调 Python 函数"""
+    # 模板中只有反斜杠是特殊字符，基础 URL 中的反斜杠需转义
+    return r'![\g<1>](' + base_url.replace('\\', '\\\\') + r'\g<2>)'
+
 def replace_image_paths(content: str, relative_path_pattern: str, base_url: str) -> str:
     """替换 Markdown 中的图片相对路径为绝对 URL 地址
     
@@ -20,86 +41,84 @@ def replace_image_paths(content: str, relative_path_pattern: str, base_url: str)
     Returns:
         处理后的内容
     """
-    # 转义相对路径模式中的特殊字符，以便在正则表达式中使用
-    escaped_pattern = re.escape(relative_path_pattern)
-    
-    # 构造匹配模式：![任意文本](相对路径模式任意路径)
-    pattern = re.compile(fr'!\[(.*?)\]\(({escaped_pattern}[^)]+)\)')
+    return replace_image_paths_count(content, relative_path_pattern, base_url)[0]
+
+def replace_image_paths_count(content: str, relative_path_pattern: str, base_url: str) -> Tuple[str, int]:
+    """与 replace_image_paths 相同，额外返回替换的数量（一次扫描完成替换与计数）"""
+    # 匹配必然包含 "](" + 相对路径模式，先做子串检查，不含时省去整篇正则扫描
+    if '](' + relative_path_pattern not in content:
+        return content, 0
     
-    def replace_match(match):
-        alt_text = match.group(1)
-        relative_path = match.group(2)
-        
-        # 组合新的绝对路径
-        # 从相对路径中提取后面的部分
-        path_suffix = relative_path[len(relative_path_pattern):]
-        absolute_path = f"{base_url}{path_suffix}"
-        
-        return f"![{alt_text}]({absolute_path})"
+    pattern = _image_pattern(relative_path_pattern)
     
     # 替换所有匹配项
-    modified_content = pattern.sub(replace_match, content)
-    
-    return modified_content
+    return pattern.subn(_image_template(base_url), content)
 
-def process_file(filename: str, relative_path_pattern: str, base_url: str) -> Tuple[int, List[str]]:
+def process_file(filename: str, relative_path_pattern: str, base_url: str,
+                 verbose: bool = True) -> Tuple[int, List[str]]:
     """处理单个 Markdown 文件中的图片路径
     
     Args:
         filename: 要处理的文件名
         relative_path_pattern: 相对路径模式，例如 "images/"
         base_url: 基础 URL 地址，用于前缀
+        verbose: 是否输出逐文件的进度信息（错误信息始终输出）
         
     Returns:
         元组，包含替换的数量和错误消息列表
     """
-    console.print(f"[bold blue]处理文件:[/] {filename}")
+    if verbose:
+        console.print(f"[bold blue]处理文件:[/] {filename}")
     
     if not os.path.exists(filename):
         console.print(f"[bold red]错误:[/] 文件 {filename} 不存在")
         return 0, [f"文件 {filename} 不存在"]
     
     try:
-        with open(filename, 'r', encoding='utf-8') as file:
-            content = file.read()
+        content = read_text(filename, ('](' + relative_path_pattern).encode('utf-8'))
     except Exception as e:
         console.print(f"[bold red]读取文件出错:[/] {str(e)}")
         return 0, [f"读取文件出错: {str(e)}"]
     
-    # 保存原始内容以便比较
-    original_content = content
-    
-    # 替换图片路径
-    modified_content = replace_image_paths(content, relative_path_pattern, base_url)
+    if content is None:
+        if verbose:
+            console.print("[yellow]未找到需要替换的图片路径[/]")
+        return 0, []
     
-    # 计算替换的数量
-    escaped_pattern = re.escape(relative_path_pattern)
-    count = len(re.findall(fr'!\[(.*?)\]\(({escaped_pattern}[^)]+)\)', original_content))
+    # 替换图片路径，subn 同时返回替换的数量
+    modified_content, count = replace_image_paths_count(content, relative_path_pattern, base_url)
     
     if count == 0:
-        console.print("[yellow]未找到需要替换的图片路径[/]")
+        if verbose:
+            console.print("[yellow]未找到需要替换的图片路径[/]")
         return 0, []
     
     try:
         # 写入更新后的内容到文件
         with open(filename, 'w', encoding='utf-8') as file:
             file.write(modified_content)
-        console.print(Panel(f"[bold green]成功替换 {count} 处图片路径[/]", 
-                          title="处理完成", border_style="green"))
+        if verbose:
+            console.print(Panel(f"[bold green]成功替换 {count} 处图片路径[/]", 
+                              title="处理完成", border_style="green"))
     except Exception as e:
         console.print(f"[bold red]写入文件出错:[/] {str(e)}")
         return count, [f"写入文件出错: {str(e)}"]
     
     return count, []
 
-def process_directory(directory: str, relative_path_pattern: str, base_url: str, recursive: bool = False) -> Tuple[int, int]:
+def process_directory(directory: str, relative_path_pattern: str, base_url: str, recursive: bool = False,
+                      verbose: bool = False, max_workers: Optional[int] = None) -> Tuple[int, int]:
     """处理目录中的所有.md文件
     
+    各文件相互独立，默认用进程池并行处理；verbose 时改为串行，保证输出顺序可读。
+    
     Args:
         directory: 要处理的目录
         relative_path_pattern: 相对路径模式，例如 "images/"
         base_url: 基础 URL 地址
         recursive: 是否递归处理子目录
+        verbose: 是否输出逐文件的进度信息，默认只在结束时输出汇总
+        max_workers: 并行进程数，None 为 CPU 核数，1 为串行
         
     Returns:
         元组，包含处理的文件数和替换的路径数
@@ -113,18 +132,20 @@ def process_directory(directory: str, relative_path_pattern: str, base_url: str,
     total_files = 0
     total_replacements = 0
     
-    for item in os.listdir(directory):
-        full_path = os.path.join(directory, item)
-        
-        if os.path.isfile(full_path) and full_path.lower().endswith('.md'):
-            count, _ = process_file(full_path, relative_path_pattern, base_url)
+    md_files = iter_md_files(directory, recursive)
+    file_args = (md_files, repeat(relative_path_pattern), repeat(base_url))
+    if verbose or max_workers == 1:
+        for count, _ in map(process_file, *file_args, repeat(verbose)):
+            total_replacements += count
+            if count > 0:
+                total_files += 1
+        return total_files, total_replacements
+    
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        for count, _ in executor.map(process_file, *file_args, repeat(False), chunksize=8):
             total_replacements += count
             if count > 0:
                 total_files += 1
-        elif os.path.isdir(full_path) and recursive:
-            files, replacements = process_directory(full_path, relative_path_pattern, base_url, recursive)
-            total_files += files
-            total_replacements += replacements
     
     return total_files, total_replacements
 
@@ -181,6 +202,8 @@ def main():
     parser.add_argument('-r', '--recursive', action='store_true', help='递归处理子目录')
     parser.add_argument('-i', '--interactive', action='store_true', help='交互式输入模式')
     parser.add_argument('-d', '--demo', action='store_true', help='运行演示，处理当前目录下的1.md文件')
+    parser.add_argument('-v', '--verbose', action='store_true', help='处理目录时输出逐文件的详细信息')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='处理目录时的并行进程数（默认CPU核数）')
     
     args = parser.parse_args()
     
@@ -217,7 +240,8 @@ def main():
         return
         
     if os.path.isdir(path):
-        files, replacements = process_directory(path, relative_path_pattern, base_url, args.recursive)
+        files, replacements = process_directory(path, relative_path_pattern, base_url, args.recursive,
+                                                   args.verbose, args.workers)
         console.print(Panel(f"[bold green]共处理了 {files} 个文件，替换了 {replacements} 处图片路径[/]", 
                           title="处理完成", border_style="green"))
     elif os.path.isfile(path):
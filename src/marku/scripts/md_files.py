@@ -0,0 +1,50 @@
+"""Markdown 文件遍历与读取等各脚本共用的文件工具"""
+import mmap
+import os
+from typing import Iterator, Optional
+
+# 扩展名的全部大小写组合，endswith 直接比较，无需对每个文件名 lower()
+_MD_SUFFIXES = ('.md', '.MD', '.Md', '.mD')
+# 递归时跳过的目录：隐藏目录（.git 等）与 node_modules
+_SKIP_DIR_NAMES = frozenset(['node_modules'])
+
+def iter_md_files(directory_path: str, recursive: bool = True) -> Iterator[str]:
+    """
+    基于 os.scandir 惰性遍历目录下的 Markdown 文件，recursive 为 True 时包含子目录
+    （跳过隐藏目录与 node_modules），DirEntry 自带类型信息，无需对每个文件额外 stat
+    """
+    stack = [directory_path]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                name = entry.name
+                if name.endswith(_MD_SUFFIXES) and entry.is_file():
+                    yield entry.path
+                elif (recursive and entry.is_dir(follow_symlinks=False)
+                      and name[:1] != '.' and name not in _SKIP_DIR_NAMES):
+                    stack.append(entry.path)
+
+# 超过该大小的文件经只读 mmap 访问，更小的文件直接整块读入 bytes
+MMAP_THRESHOLD = 256 * 1024
+
+def read_text(filename: str, needle: bytes) -> Optional[str]:
+    """以 UTF-8 读取文件文本（换行与文本模式一致地统一为 \\n）
+    
+    先在字节层面查找 needle，文件中不含 needle 时返回 None，无需解码整个文件。
+    大文件通过 mmap 查找并直接从映射区解码，省去 read() 产生的中间 bytes 副本。
+    """
+    if os.path.getsize(filename) < MMAP_THRESHOLD:
+        with open(filename, 'rb') as file:
+            data = file.read()
+        if needle not in data:
+            return None
+        content = data.decode('utf-8')
+    else:
+        with open(filename, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm.find(needle) < 0:
+                return None
+            with memoryview(mm) as view:
+                content = str(view, 'utf-8')
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
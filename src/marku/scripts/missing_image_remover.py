@@ -2,13 +2,20 @@ import re
 import os
 import argparse
 import urllib.parse
-from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Optional, Tuple
 from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Prompt, Confirm
 
+from .md_files import iter_md_files
+
 console = Console()
 
+# 图片链接模式在模块加载时编译一次，各文件共享
+_IMG_RE = re.compile(r'!\[(.*?)\]\(([^)]+)\)')
+
 def is_image_valid(image_path: str, base_dir: str, check_file_uri: bool = True, check_relative: bool = False) -> bool:
     """检查图片路径是否存在
     
@@ -61,7 +68,10 @@ def remove_missing_images(content: str, base_dir: str, check_file_uri: bool = Tr
     Returns:
         处理后的内容和被移除的图片数
     """
-    pattern = re.compile(r'!\[(.*?)\]\(([^)]+)\)')
+    # 图片链接必然包含 "!["，不含时无需正则扫描
+    if '![' not in content:
+        return content, 0
+    
     removed_count = 0
     
     def replacer(match):
@@ -76,24 +86,36 @@ def remove_missing_images(content: str, base_dir: str, check_file_uri: bool = Tr
         
         return match.group(0)
     
-    new_content = pattern.sub(replacer, content)
+    new_content = _IMG_RE.sub(replacer, content)
     return new_content, removed_count
 
-def process_file(filename: str, check_file_uri: bool = True, check_relative: bool = False) -> Tuple[int, List[str]]:
+def process_file(filename: str, check_file_uri: bool = True, check_relative: bool = False,
+                 verbose: bool = True) -> Tuple[int, List[str]]:
     """处理单个文件
+    
+    verbose 为 False 时不输出逐文件的进度信息（错误信息始终输出）
     """
-    console.print(f"[bold blue]处理文件:[/] {filename}")
+    if verbose:
+        console.print(f"[bold blue]处理文件:[/] {filename}")
     
     if not os.path.exists(filename):
         console.print(f"[bold red]错误:[/] 文件 {filename} 不存在")
         return 0, [f"文件 {filename} 不存在"]
     
     try:
-        with open(filename, 'r', encoding='utf-8') as file:
-            content = file.read()
+        # 整块读入 bytes 后一次解码，省去文本模式增量解码器的逐块处理；
+        # 不含图片链接的文件无需解码
+        with open(filename, 'rb') as file:
+            data = file.read()
+        if b'![' not in data:
+            return 0, []
+        content = data.decode('utf-8')
     except Exception as e:
         console.print(f"[bold red]读取文件出错:[/] {str(e)}")
         return 0, [f"读取文件出错: {str(e)}"]
+    # 与文本模式读取一致，统一换行为 \n
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
     
     base_dir = os.path.dirname(os.path.abspath(filename))
     modified_content, removed_count = remove_missing_images(content, base_dir, check_file_uri, check_relative)
@@ -104,16 +126,22 @@ def process_file(filename: str, check_file_uri: bool = True, check_relative: boo
     try:
         with open(filename, 'w', encoding='utf-8') as file:
             file.write(modified_content)
-        console.print(Panel(f"[bold green]成功移除 {removed_count} 处失效图片链接[/]", 
-                          title="处理完成", border_style="green"))
+        if verbose:
+            console.print(Panel(f"[bold green]成功移除 {removed_count} 处失效图片链接[/]", 
+                              title="处理完成", border_style="green"))
     except Exception as e:
         console.print(f"[bold red]写入文件出错:[/] {str(e)}")
         return removed_count, [f"写入文件出错: {str(e)}"]
     
     return removed_count, []
 
-def process_directory(directory: str, check_file_uri: bool = True, check_relative: bool = False, recursive: bool = False) -> Tuple[int, int]:
-    """处理目录"""
+def process_directory(directory: str, check_file_uri: bool = True, check_relative: bool = False, recursive: bool = False,
+                      verbose: bool = False, max_workers: Optional[int] = None) -> Tuple[int, int]:
+    """处理目录
+    
+    各文件相互独立，默认用进程池并行处理；verbose 时改为串行，保证输出顺序可读。
+    max_workers 为 None 时使用 CPU 核数，为 1 时串行。
+    """
     console.print(f"[bold blue]处理目录:[/] {directory}")
     
     if not os.path.isdir(directory):
@@ -123,18 +151,20 @@ def process_directory(directory: str, check_file_uri: bool = True, check_relativ
     total_files = 0
     total_removed = 0
     
-    for item in os.listdir(directory):
-        full_path = os.path.join(directory, item)
-        
-        if os.path.isfile(full_path) and full_path.lower().endswith('.md'):
-            removed, _ = process_file(full_path, check_file_uri, check_relative)
+    md_files = iter_md_files(directory, recursive)
+    file_args = (md_files, repeat(check_file_uri), repeat(check_relative))
+    if verbose or max_workers == 1:
+        for removed, _ in map(process_file, *file_args, repeat(verbose)):
             total_removed += removed
             if removed > 0:
                 total_files += 1
-        elif os.path.isdir(full_path) and recursive:
-            files, removed = process_directory(full_path, check_file_uri, check_relative, recursive)
-            total_files += files
+        return total_files, total_removed
+    
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        for removed, _ in executor.map(process_file, *file_args, repeat(False), chunksize=8):
             total_removed += removed
+            if removed > 0:
+                total_files += 1
             
     return total_files, total_removed
 
@@ -144,6 +174,8 @@ def main():
     parser.add_argument('-r', '--recursive', action='store_true', help='递归处理子目录')
     parser.add_argument('--check-relative', action='store_true', help='开启相对路径或纯本地路径检查（默认关闭）')
     parser.add_argument('--no-check-file-uri', action='store_true', help='关闭 file:/// 检查（默认开启）')
+    parser.add_argument('-v', '--verbose', action='store_true', help='处理目录时输出逐文件的详细信息')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='处理目录时的并行进程数（默认CPU核数）')
     
     args = parser.parse_args()
     
@@ -157,7 +189,8 @@ def main():
     check_relative = args.check_relative
     
     if os.path.isdir(path):
-        files, removed = process_directory(path, check_file_uri, check_relative, args.recursive)
+        files, removed = process_directory(path, check_file_uri, check_relative, args.recursive,
+                                           args.verbose, args.workers)
         console.print(Panel(f"[bold green]共处理了 {files} 个文件，移除了 {removed} 处失效图片[/]", 
                           title="处理完成", border_style="green"))
     elif os.path.isfile(path):
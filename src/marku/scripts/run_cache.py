@@ -0,0 +1,37 @@
+"""各脚本共用的持久化处理缓存：~/.glowtoolbox/cache/<名称>.json"""
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict
+
+CACHE_DIR = Path.home() / ".glowtoolbox" / "cache"
+
+def cache_file(name: str) -> Path:
+    """缓存名称对应的缓存文件路径"""
+    return CACHE_DIR / f"{name}.json"
+
+def load_cache(name: str) -> Dict[str, Any]:
+    """读取缓存，文件不存在或内容损坏时返回空字典"""
+    try:
+        return json.loads(cache_file(name).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(name: str, cache: Dict[str, Any]):
+    """写回缓存，写入失败只提示，不影响本次处理结果"""
+    path = cache_file(name)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(cache, ensure_ascii=False), encoding="utf-8")
+    except OSError as e:
+        print(f"[{name}] 缓存写入失败: {e}")
+
+@lru_cache(maxsize=None)
+def source_digest(*paths: str) -> str:
+    """给定源码文件的合并摘要，写入缓存签名：处理逻辑有改动时已有缓存自动失效"""
+    h = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
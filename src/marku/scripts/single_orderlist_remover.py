@@ -1,67 +1,86 @@
 import re
 import os
 import argparse
-from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Optional, Tuple
 from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Prompt, Confirm
 from rich import print as rprint
 
+from .md_files import iter_md_files
+
 console = Console()
 
-def process_ordered_lists(content: str) -> str:
+# 有序列表项：数字+点+空格（模块加载时编译一次）
+_ORDERED_LIST_RE = re.compile(r'^\s*\d+\.\s')
+# 孤立列表项中需要去掉的第一个 ". "
+_REPLACE_RE = re.compile(r'(\d+)\.\s')
+# verbose 时逐行列出的替换记录上限，超出部分只输出总数
+MAX_REPORT_LINES = 50
+
+def process_ordered_lists(content: str, verbose: bool = True) -> str:
     """处理Markdown文件中的单行有序列表，如果一个有序列表上下3行没有有序列表，则将". "替换为"."
     
     Args:
         content: Markdown内容字符串
+        verbose: 是否输出每一处替换
         
     Returns:
         处理后的内容
     """
+    return process_ordered_lists_changes(content, verbose)[0]
+
+def process_ordered_lists_changes(content: str, verbose: bool = True) -> Tuple[str, List[int]]:
+    """与 process_ordered_lists 相同，额外返回被修改的行号列表（从 0 开始），无需再比较前后内容"""
+    # 直接在行列表上原地修改，不再整体复制一份；verbose 时只为需要列出的替换保留原行
     lines = content.split('\n')
-    modified_lines = lines.copy()
-    pattern = re.compile(r'^\s*\d+\.\s')  # 匹配有序列表模式：数字+点+空格
-    
-    # 标记每一行是否为有序列表项
-    is_ordered_list = [bool(pattern.match(line)) for line in lines]
-    
-    # 处理每一行
-    for i in range(len(lines)):
-        if is_ordered_list[i]:
-            # 检查上下3行是否有其他有序列表项
-            is_isolated = True
-            
-            # 检查上面3行
-            for j in range(max(0, i-3), i):
-                if is_ordered_list[j]:
-                    is_isolated = False
-                    break
-            
-            # 如果上面没有相关项，检查下面3行
-            if is_isolated:
-                for j in range(i+1, min(i+4, len(lines))):
-                    if is_ordered_list[j]:
-                        is_isolated = False
-                        break
-            
-            # 如果这是一个独立的有序列表项，替换". "为"."
-            if is_isolated:
-                # 使用正则表达式替换第一个". "为"."
-                modified_lines[i] = re.sub(r'(\d+)\.\s', r'\1.', lines[i], count=1)
-                console.print(f"[yellow]替换行 {i+1}:[/] {lines[i]} -> {modified_lines[i]}")
-    
-    return '\n'.join(modified_lines)
+    
+    # 一次扫描收集所有有序列表项的行号（升序）
+    match = _ORDERED_LIST_RE.match
+    ordered = [i for i, line in enumerate(lines) if match(line)]
+    changed = []
+    originals = []
+    
+    # 上下3行内是否有其他有序列表项，只需看相邻两个列表项的行距，无需逐行回看
+    prev = -4
+    for k, i in enumerate(ordered):
+        next_i = ordered[k + 1] if k + 1 < len(ordered) else i + 4
+        is_isolated = i - prev > 3 and next_i - i > 3
+        prev = i
+        
+        # 如果这是一个独立的有序列表项，替换". "为"."
+        if is_isolated:
+            # 使用正则表达式替换第一个". "为"."
+            if verbose and len(originals) < MAX_REPORT_LINES:
+                originals.append(lines[i])
+            lines[i] = _REPLACE_RE.sub(r'\1.', lines[i], count=1)
+            changed.append(i)
+    
+    if not changed:
+        return content, changed
+    
+    # 替换记录汇总后一次输出，避免在循环中逐条经过 Rich 的标记解析与渲染
+    if verbose:
+        report = [f"[yellow]替换行 {i+1}:[/] {old} -> {lines[i]}" for i, old in zip(changed, originals)]
+        if len(changed) > MAX_REPORT_LINES:
+            report.append(f"[yellow]……共替换 {len(changed)} 行，其余 {len(changed) - MAX_REPORT_LINES} 行省略[/]")
+        console.print('\n'.join(report))
+    return '\n'.join(lines), changed
 
-def process_file(filename: str) -> Tuple[int, List[str]]:
+def process_file(filename: str, verbose: bool = True) -> Tuple[int, List[str]]:
     """处理单个Markdown文件
     
     Args:
         filename: 要处理的文件名
+        verbose: 是否输出逐文件的进度信息（错误信息始终输出）
         
     Returns:
         元组，包含处理的条目数和错误消息列表
     """
-    console.print(f"[bold blue]处理文件:[/] {filename}")
+    if verbose:
+        console.print(f"[bold blue]处理文件:[/] {filename}")
     
     if not os.path.exists(filename):
         console.print(f"[bold red]错误:[/] 文件 {filename} 不存在")
@@ -74,37 +93,39 @@ def process_file(filename: str) -> Tuple[int, List[str]]:
         console.print(f"[bold red]读取文件出错:[/] {str(e)}")
         return 0, [f"读取文件出错: {str(e)}"]
     
-    # 保存原始内容以便比较
-    original_content = content
-    
-    # 处理有序列表
-    modified_content = process_ordered_lists(content)
-    
-    # 计算修改的行数
-    changes_count = sum(1 for a, b in zip(original_content.split('\n'), modified_content.split('\n')) if a != b)
+    # 处理有序列表，修改的行数直接取自处理过程
+    modified_content, changed_lines = process_ordered_lists_changes(content, verbose)
+    changes_count = len(changed_lines)
     
     if changes_count == 0:
-        console.print("[yellow]未找到需要处理的单行有序列表[/]")
+        if verbose:
+            console.print("[yellow]未找到需要处理的单行有序列表[/]")
         return 0, []
     
     try:
         # 写入更新后的内容到文件
         with open(filename, 'w', encoding='utf-8') as file:
             file.write(modified_content)
-        console.print(Panel(f"[bold green]成功处理 {changes_count} 行有序列表[/]", 
-                          title="处理完成", border_style="green"))
+        if verbose:
+            console.print(Panel(f"[bold green]成功处理 {changes_count} 行有序列表[/]", 
+                              title="处理完成", border_style="green"))
     except Exception as e:
         console.print(f"[bold red]写入文件出错:[/] {str(e)}")
         return changes_count, [f"写入文件出错: {str(e)}"]
     
     return changes_count, []
 
-def process_directory(directory: str, recursive: bool = False) -> Tuple[int, int]:
+def process_directory(directory: str, recursive: bool = False, verbose: bool = False,
+                      max_workers: Optional[int] = None) -> Tuple[int, int]:
     """处理目录中的所有.md文件
     
+    各文件相互独立，默认用进程池并行处理；verbose 时改为串行，保证输出顺序可读。
+    
     Args:
         directory: 要处理的目录
         recursive: 是否递归处理子目录
+        verbose: 是否输出逐文件的进度信息，默认只在结束时输出汇总
+        max_workers: 并行进程数，None 为 CPU 核数，1 为串行
         
     Returns:
         元组，包含处理的文件数和修改的行数
@@ -118,18 +139,19 @@ def process_directory(directory: str, recursive: bool = False) -> Tuple[int, int
     total_files = 0
     total_changes = 0
     
-    for item in os.listdir(directory):
-        full_path = os.path.join(directory, item)
-        
-        if os.path.isfile(full_path) and full_path.lower().endswith('.md'):
-            changes, _ = process_file(full_path)
+    md_files = iter_md_files(directory, recursive)
+    if verbose or max_workers == 1:
+        for changes, _ in map(process_file, md_files, repeat(verbose)):
             total_changes += changes
             if changes > 0:
                 total_files += 1
-        elif os.path.isdir(full_path) and recursive:
-            files, changes = process_directory(full_path, recursive)
-            total_files += files
+        return total_files, total_changes
+    
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        for changes, _ in executor.map(process_file, md_files, repeat(False), chunksize=8):
             total_changes += changes
+            if changes > 0:
+                total_files += 1
     
     return total_files, total_changes
 
@@ -139,6 +161,8 @@ def main():
     parser.add_argument('path', nargs='?', default=None, help='要处理的文件或目录路径')
     parser.add_argument('-r', '--recursive', action='store_true', help='递归处理子目录')
     parser.add_argument('-d', '--demo', action='store_true', help='运行演示，处理当前目录下的1.md文件')
+    parser.add_argument('-v', '--verbose', action='store_true', help='处理目录时输出逐文件的详细信息')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='处理目录时的并行进程数（默认CPU核数）')
     
     args = parser.parse_args()
     
@@ -164,7 +188,7 @@ def main():
         path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '1.md')
         
     if os.path.isdir(path):
-        files, changes = process_directory(path, recursive)
+        files, changes = process_directory(path, recursive, args.verbose, args.workers)
         console.print(Panel(f"[bold green]共处理了 {files} 个文件，修改了 {changes} 处有序列表[/]", 
                           title="处理完成", border_style="green"))
     elif os.path.isfile(path):
@@ -1,11 +1,10 @@
-import re
 import pyperclip
 from loguru import logger
-import os
 import sys
 from pathlib import Path
 from datetime import datetime
 import time
+from functools import lru_cache
 
 def setup_logger(app_name="app", project_root=None, console_output=True):
     """配置 Loguru 日志系统
@@ -35,16 +34,11 @@ def setup_logger(app_name="app", project_root=None, console_output=True):
             format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <blue>{elapsed}</blue> | <level>{level.icon} {level: <8}</level> | <cyan>{name}:{function}:{line}</cyan> - <level>{message}</level>"
         )
     
-    # 使用 datetime 构建日志路径
-    current_time = datetime.now()
-    date_str = current_time.strftime("%Y-%m-%d")
-    hour_str = current_time.strftime("%H")
-    minute_str = current_time.strftime("%M%S")
-    
-    # 构建日志目录和文件路径
-    log_dir = os.path.join(project_root, "logs", app_name, date_str, hour_str)
-    os.makedirs(log_dir, exist_ok=True)
-    log_file = os.path.join(log_dir, f"{minute_str}.log")
+    # 使用 datetime 构建日志路径：logs/<应用名>/<日期>/<小时>/<分秒>.log
+    date_str, hour_str, minute_str = datetime.now().strftime("%Y-%m-%d %H %M%S").split()
+    log_dir = Path(project_root, "logs", app_name, date_str, hour_str)
+    # 日志目录由 loguru 在打开日志文件时自动创建，无需预先 makedirs
+    log_file = log_dir / f"{minute_str}.log"
     
     # 添加文件处理器
     logger.add(
@@ -55,12 +49,16 @@ def setup_logger(app_name="app", project_root=None, console_output=True):
         compression="zip",
         encoding="utf-8",
         format="{time:YYYY-MM-DD HH:mm:ss} | {elapsed} | {level.icon} {level: <8} | {name}:{function}:{line} - {message}",
-        enqueue=True,     )
+        # 单进程、单线程的一次性脚本，同步写入即可，无需 enqueue 的队列与后台线程
+        enqueue=False,
+        # 透传给 open()：256 KiB 写缓冲，一次运行的日志通常只需在关闭时一次写入
+        buffering=1 << 18,
+    )
     
     # 创建配置信息字典
     config_info = {
-        'log_file': log_file,
-        'log_dir': log_dir,
+        'log_file': str(log_file),
+        'log_dir': str(log_dir),
         'project_root': project_root,
     }
     
@@ -68,18 +66,96 @@ def setup_logger(app_name="app", project_root=None, console_output=True):
     logger.debug(f"日志文件路径: {log_file}")
     return logger, config_info
 
-# 初始化日志系统
-logger, config_info = setup_logger(app_name="t2list", console_output=False)
+# 日志系统在首次使用时才初始化（创建日志目录、安装文件处理器），仅导入本模块不产生副作用
+config_info = None
+
+def _lazy_init():
+    """初始化日志系统，重复调用时直接返回"""
+    global config_info
+    if config_info is not None:
+        return
+    _, config_info = setup_logger(app_name="t2list", console_output=False)
+
+# 各缩进级别的前缀（标题最多 6 级，内容缩进最多 6 级），查表代替逐行重复构造
+_INDENTS = tuple("    " * i for i in range(7))
+# 重置下级计数器时按切片整体赋值，代替逐项循环
+_ZEROS = (0,) * 6
+# 超过该长度的文本不进入结果缓存，避免缓存长期占用大量内存
+CACHE_MAX_CHARS = 1_000_000
+
+def _text_after_space(rest):
+    """返回与正则 \\s+(.+)$ 匹配 rest 时 (.+) 相同的文本，无法匹配时返回 None
+
+    行由 splitlines 得到，不含换行符，无需考虑 . 与 $ 对换行的处理；
+    str.lstrip 与 \\s 认定的空白字符相同。
+    """
+    text = rest.lstrip()
+    if len(text) == len(rest):
+        return None
+    if text:
+        return text
+    # 剩余部分全是空白：与正则回溯一致，至少两个空白时最后一个空白归入 (.+)
+    if len(rest) >= 2:
+        return rest[-1:]
+    return None
+
+def _match_heading(line):
+    """
+    手写的标题行扫描器：行首 1-6 个 # 后跟空白与标题文本，
+    与正则 (#{1,6})\\s+(.+)$ 的 match 语义一致但不经过正则引擎
+
+    返回:
+        tuple|None: (标题级别, 标题文本)，不是标题时返回None
+    """
+    if line[:1] != '#':
+        return None
+    rest = line.lstrip('#')
+    level = len(line) - len(rest)
+    if level > 6:
+        return None
+    title = _text_after_space(rest)
+    if title is None:
+        return None
+    return level, title
+
+def _is_list_item(line):
+    """判断是否为列表行（前导空白 + 数字加点 / * / - + 空白 + 内容），与正则 \\s*(?:\\d+\\.|\\*|\\-)\\s+.+$ 的 match 语义一致"""
+    text = line.lstrip()
+    c = text[:1]
+    if c == '*' or c == '-':
+        return _text_after_space(text[1:]) is not None
+    if not c.isdecimal():
+        return False
+    i = 1
+    end = len(text)
+    while i < end and text[i].isdecimal():
+        i += 1
+    if i == end or text[i] != '.':
+        return False
+    return _text_after_space(text[i + 1:]) is not None
 
 def convert_headings_to_list(text):
     """将Markdown标题转换为带缩进的有序列表
     
+    转换结果只取决于输入文本，同一进程内重复转换相同内容时直接返回缓存结果。
+    
     Args:
         text: 输入的Markdown文本
         
     Returns:
         str: 转换后的文本
     """
+    if text and len(text) <= CACHE_MAX_CHARS:
+        return _convert_cached(text)
+    return _convert(text)
+
+@lru_cache(maxsize=8)
+def _convert_cached(text):
+    return _convert(text)
+
+def _convert(text):
+    """convert_headings_to_list 的实际转换过程"""
+    _lazy_init()
     start_time = time.time()
     logger.info("开始转换标题为列表")
     logger.debug(f"输入文本长度: {len(text)} 字符")
@@ -90,14 +166,15 @@ def convert_headings_to_list(text):
             return ""
         
         lines = text.splitlines()
-        logger.debug(f"总行数: {len(lines)}")
+        logger.info(f"总行数: {len(lines)}")
         
         result = []
         counters = [0] * 6  # 每个级别的计数器
         level_stack = []    # 用于跟踪标题层级
         current_indent = 0  # 当前缩进级别
         in_list = False     # 是否在处理列表
-        list_block = []     # 当前列表块
+        # 列表行按顺序产生，且在遇到其他行之前不会有别的输出，直接写入 result，无需先缓存为列表块
+        append = result.append
         content_indent = 0  # 内容的缩进级别（标题缩进+1）
         
         # 统计信息
@@ -106,105 +183,74 @@ def convert_headings_to_list(text):
         empty_lines = 0
         other_lines = 0
         
-        for line_num, line in enumerate(lines, 1):
-            try:
-                heading_match = re.match(r'^(#{1,6})\s+(.+)$', line)
-                list_match = re.match(r'^(\s*)((?:\d+\.|\*|\-)\s+)(.+)$', line)
+        # 循环内不逐行写 DEBUG 日志（文件处理器为 DEBUG 级别，逐行格式化与写入会主导耗时），
+        # 只在结束时汇总统计；逐行处理只涉及字符串操作，异常由外层统一记录
+        for line in lines:
+            # 逐行分类使用手写扫描，不经过正则引擎，也不为每行创建匹配对象
+            heading = _match_heading(line) if line[:1] == '#' else None
+            
+            # 处理标题
+            if heading:
+                processed_headings += 1
+                # 标题结束当前列表块
+                in_list = False
                 
-                if line_num % 100 == 0:  # 每100行记录一次进度
-                    logger.debug(f"处理进度: {line_num}/{len(lines)} 行")
+                level, content = heading
                 
-                # 处理标题
-                if heading_match:
-                    processed_headings += 1
-                    # 如果有未处理的列表，先处理它
-                    if list_block:
-                        logger.debug(f"在处理标题前，先完成 {len(list_block)} 行列表内容")
-                        result.extend(list_block)
-                        list_block = []
-                        in_list = False
-                    
-                    level = len(heading_match.group(1))
-                    content = heading_match.group(2)
-                    
-                    logger.debug(f"第{line_num}行: 找到 H{level} 标题: {content[:30]}{'...' if len(content) > 30 else ''}")
-                    
-                    # 更新层级栈
-                    while level_stack and level_stack[-1] >= level:
-                        level_stack.pop()
-                    level_stack.append(level)
-                    
-                    # 计算标题缩进
-                    current_indent = len(level_stack) - 1
-                    # 内容缩进比标题多一级
-                    content_indent = current_indent + 1
-                    
-                    logger.debug(f"标题层级栈: {level_stack}, 当前缩进: {current_indent}")
-                    
-                    # 更新计数器
-                    counters[current_indent] += 1
-                    for i in range(current_indent + 1, 6):
-                        counters[i] = 0
-                        
-                    # 生成标题行
-                    indent = "    " * current_indent
-                    number = str(counters[current_indent]) + "."
-                    
-                    if '**' in content:
-                        formatted_line = f"{indent}{number} {content}"
-                    else:
-                        formatted_line = f"{indent}{number} **{content}**"
-                    
-                    result.append(formatted_line)
-                    logger.debug(f"生成标题行: {formatted_line}")
-                    
-                # 处理列表
-                elif list_match or (in_list and line.strip() and line.startswith('    ')):
-                    if not in_list:
-                        in_list = True
-                        list_block = []
-                        processed_lists += 1
-                        logger.debug(f"第{line_num}行: 开始处理新的列表块")
-                    
-                    # 列表项在内容缩进级别的基础上保持原有的相对缩进
-                    base_indent = "    " * content_indent
-                    extra_indent = " " * (len(line) - len(line.lstrip()))
-                    formatted_line = base_indent + extra_indent + line.lstrip()
-                    list_block.append(formatted_line)
-                    
-                # 处理空行
-                elif not line.strip():
-                    empty_lines += 1
-                    if list_block:
-                        logger.debug(f"第{line_num}行: 遇到空行，完成当前列表块 ({len(list_block)} 行)")
-                        result.extend(list_block)
-                        list_block = []
-                        in_list = False
-                    result.append(line)
+                # 更新层级栈
+                while level_stack and level_stack[-1] >= level:
+                    level_stack.pop()
+                level_stack.append(level)
+                
+                # 计算标题缩进
+                current_indent = len(level_stack) - 1
+                # 内容缩进比标题多一级
+                content_indent = current_indent + 1
+                
+                # 更新计数器
+                counters[current_indent] += 1
+                counters[current_indent + 1:] = _ZEROS[current_indent + 1:]
                     
-                # 处理其他行
+                # 生成标题行
+                indent = _INDENTS[current_indent]
+                number = str(counters[current_indent]) + "."
+                
+                if '**' in content:
+                    formatted_line = f"{indent}{number} {content}"
                 else:
-                    other_lines += 1
-                    if list_block:
-                        logger.debug(f"第{line_num}行: 遇到其他内容，完成当前列表块 ({len(list_block)} 行)")
-                        result.extend(list_block)
-                        list_block = []
-                        in_list = False
-                    # 其他内容也使用内容缩进级别
-                    formatted_line = "    " * content_indent + line
-                    result.append(formatted_line)
-                    
-            except Exception as line_error:
-                logger.error(f"处理第{line_num}行时出错: {line_error}")
-                logger.debug(f"问题行内容: {line}")
-                # 出错时保持原行不变
-                result.append(line)
-                continue
-        
-        # 处理最后的列表块
-        if list_block:
-            logger.debug(f"处理最终剩余的列表块 ({len(list_block)} 行)")
-            result.extend(list_block)
+                    formatted_line = f"{indent}{number} **{content}**"
+                
+                append(formatted_line)
+                
+            # 处理列表
+            elif _is_list_item(line) or (in_list and line.strip() and line.startswith('    ')):
+                if not in_list:
+                    in_list = True
+                    processed_lists += 1
+                
+                # 列表项在内容缩进级别的基础上保持原有的相对缩进（前导空白统一为等宽空格）
+                stripped = line.lstrip()
+                width = len(line) - len(stripped)
+                if line.count(' ', 0, width) == width:
+                    # 前导空白本就全是空格，直接拼接原行
+                    formatted_line = _INDENTS[content_indent] + line
+                else:
+                    formatted_line = _INDENTS[content_indent] + " " * width + stripped
+                append(formatted_line)
+                
+            # 处理空行
+            elif not line.strip():
+                empty_lines += 1
+                in_list = False
+                append(line)
+                
+            # 处理其他行
+            else:
+                other_lines += 1
+                in_list = False
+                # 其他内容也使用内容缩进级别
+                formatted_line = _INDENTS[content_indent] + line
+                append(formatted_line)
         
         # 记录统计信息和性能
         elapsed_time = time.time() - start_time
@@ -222,6 +268,7 @@ def convert_headings_to_list(text):
 
 def main():
     """主函数：从剪贴板读取内容，转换后写回剪贴板"""
+    _lazy_init()
     program_start_time = time.time()
     
     try:
@@ -240,14 +287,14 @@ def main():
             logger.warning("剪贴板内容为空，程序退出")
             return
         
-        # 分析输入内容
-        lines_count = len(clipboard_text.splitlines())
-        heading_count = len(re.findall(r'^#{1,6}\s+', clipboard_text, re.MULTILINE))
+        # 不含 "#" 则不可能有标题，没有需要转换的内容，剪贴板保持原样
+        if "#" not in clipboard_text:
+            logger.info("剪贴板内容中没有标题，无需转换，程序退出")
+            return
         
+        # 行数与标题数量由转换过程在分行时顺带统计并记录，不再预先整篇扫描
         logger.info(f"成功读取剪贴板内容:")
         logger.info(f"  - 总字符数: {len(clipboard_text)}")
-        logger.info(f"  - 总行数: {lines_count}")
-        logger.info(f"  - 标题数量: {heading_count}")
 
         # 转换内容
         logger.info("开始转换标题为列表...")
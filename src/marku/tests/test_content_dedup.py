@@ -0,0 +1,70 @@
+"""content_dedup 脚本测试 - 验证标题扫描器与正则语义一致"""
+import os
+import stat
+import sys
+
+import pytest
+
+from marku.scripts.content_dedup import _TITLE_RE, _parse_heading, deduplicate_titles, process_stream
+
+
+@pytest.mark.parametrize("line", [
+    "# 标题",
+    "###### 六级",
+    "####### 七级",
+    "#标题",
+    "#",
+    "# ",
+    "#  ",
+    "#\t标题",
+    "##   多个空格  ",
+    "## 标题\n",
+    "# \n",
+    "#\r\n",
+    " # 缩进",
+    "",
+    "普通段落",
+])
+def test_parse_heading_matches_regex(line):
+    match = _TITLE_RE.match(line)
+    heading = _parse_heading(line)
+    if match is None:
+        assert heading is None
+    else:
+        assert heading is not None
+        assert heading[0] == len(match.group(1))
+        assert heading[1].strip() == match.group(2).strip()
+
+
+def test_deduplicate_titles_by_level():
+    content, stats = deduplicate_titles("# A\n# a\n## A\n## a", [1])
+    assert content == "# A\n## A\n## a"
+    assert stats[1]["duplicated"] == 1
+
+
+def test_deduplicate_titles_reports_requested_levels_without_headings():
+    content, stats = deduplicate_titles("正文\n", [1, 2])
+    assert content == "正文\n"
+    assert stats == {1: {"total": 0, "duplicated": 0, "titles": []},
+                     2: {"total": 0, "duplicated": 0, "titles": []}}
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Windows 不支持 POSIX 权限位")
+def test_process_stream_keeps_file_mode(tmp_path):
+    md = tmp_path / "a.md"
+    md.write_text("# A\n# A\n", encoding="utf-8")
+    os.chmod(md, 0o644)
+    assert process_stream(md)
+    assert md.read_text(encoding="utf-8") == "# A\n"
+    assert stat.S_IMODE(os.stat(md).st_mode) == 0o644
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Windows 创建符号链接需要额外权限")
+def test_process_stream_writes_through_symlink(tmp_path):
+    real = tmp_path / "real.md"
+    real.write_text("# A\n# A\n", encoding="utf-8")
+    link = tmp_path / "link.md"
+    link.symlink_to(real)
+    assert process_stream(link)
+    assert link.is_symlink()
+    assert real.read_text(encoding="utf-8") == "# A\n"
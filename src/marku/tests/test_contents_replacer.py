@@ -0,0 +1,111 @@
+"""contents_replacer 脚本测试 - 验证分块处理与整篇处理结果一致"""
+import io
+import sys
+
+import pytest
+
+from marku.scripts.contents_replacer import (
+    COMPILED_PATTERNS,
+    is_empty_table_row,
+    iter_chunks,
+    new_stats,
+    parse_header_levels,
+    transform_text,
+)
+
+LEVELS = [1, 2, 3, 4, 5, 6]
+
+DOC = (
+    "第一章\n"
+    "正文（一），内容。\n"
+    "\n\n\n\n"
+    "目 录\n"
+    "说明文字\n"
+    "| a | b | c |\n"
+    "|  |  |  |\n"
+    "|  |  |  |\n"
+    "| a | b | c |\n"
+    "表格后的文字\n"
+    "<html><body>\n"
+    "1.\n"
+    "二、小节\n"
+    "$=$ 与 $\\mathrm{x}$\n"
+    "[标记] 结尾\n"
+) * 5
+
+
+@pytest.mark.parametrize("chunk_size", [1, 8, 64, 10 ** 6])
+def test_chunked_matches_whole(chunk_size):
+    whole = transform_text(DOC, COMPILED_PATTERNS, LEVELS, new_stats())
+    stats = new_stats()
+    chunked = "".join(
+        transform_text(chunk, COMPILED_PATTERNS, LEVELS, stats)
+        for chunk in iter_chunks(io.StringIO(DOC), chunk_size)
+    )
+    assert chunked == whole
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("|  |  |", True),
+    ("| a |  |", False),
+    ("x|  |y", True),
+    ("a|", True),
+    ("| a | b |", False),
+])
+def test_is_empty_table_row(line, expected):
+    assert is_empty_table_row(line) is expected
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("1-6", [1, 2, 3, 4, 5, 6]),
+    ("1,3,6", [1, 3, 6]),
+    ("1-3,5", [1, 2, 3, 5]),
+    ("9", [1, 2, 3, 4, 5, 6]),
+    ("abc", [1, 2, 3, 4, 5, 6]),
+    ("", [1, 2, 3, 4, 5, 6]),
+])
+def test_parse_header_levels(raw, expected):
+    assert parse_header_levels(raw) == expected
+
+
+def test_cache_skips_unchanged_files(tmp_path, monkeypatch):
+    from marku.scripts import contents_replacer, run_cache
+
+    monkeypatch.setattr(run_cache, "CACHE_DIR", tmp_path)
+    clean = tmp_path / "clean.md"
+    clean.write_text("plain text\n", encoding="utf-8")
+    dirty = tmp_path / "dirty.md"
+    dirty.write_text("正文（一）\n", encoding="utf-8")
+    files = [str(clean), str(dirty)]
+
+    contents_replacer.process_files(files, LEVELS, max_workers=1, use_cache=True)
+    seen = []
+    original = contents_replacer.process_file
+    monkeypatch.setattr(contents_replacer, "process_file",
+                        lambda path, levels: seen.append(path) or original(path, levels))
+    contents_replacer.process_files(files, LEVELS, max_workers=1, use_cache=True)
+    # 无变化的文件被跳过；被改写过的文件不登记，下次仍会处理
+    assert seen == [str(dirty)]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Windows 创建符号链接需要额外权限")
+def test_process_file_writes_through_symlink(tmp_path):
+    from marku.scripts.contents_replacer import process_file
+
+    real = tmp_path / "real.md"
+    real.write_text("正文（一）\n", encoding="utf-8")
+    link = tmp_path / "link.md"
+    link.symlink_to(real)
+    process_file(str(link), LEVELS)
+    assert link.is_symlink()
+    assert real.read_text(encoding="utf-8") == "正文(一)\n"
+
+
+@pytest.mark.parametrize("number", ["一", "十", "一十", "十一", "二十", "九十九", "一十一", "两十", "二十零", "一百"])
+def test_cn_normalize_small_matches_cn2an(number):
+    cn2an = pytest.importorskip("cn2an")
+    from marku.scripts.contents_replacer import _cn_normalize_small
+
+    small = _cn_normalize_small(number)
+    if small is not None:
+        assert small == cn2an.an2cn(cn2an.cn2an(number, mode='smart'))
@@ -109,19 +109,24 @@ class TestListToHeadings:
 class TestMarktModuleConfig:
     """测试 MarktModule 的 step.config 配置"""
 
-    @pytest.fixture
-    def temp_dir(self):
-        """创建临时目录"""
+    @pytest.fixture(scope="class")
+    @classmethod
+    def temp_dir(cls):
+        """创建临时目录（本类各测试共用一个）"""
         d = tempfile.mkdtemp()
         yield Path(d)
         shutil.rmtree(d)
 
     @pytest.fixture
-    def sample_md_file(self, temp_dir):
+    def md_path(self, request, temp_dir):
+        """本测试专用的 MD 文件路径（共用临时目录，按测试名区分文件）"""
+        return temp_dir / f"{request.node.name}.md"
+
+    @pytest.fixture
+    def sample_md_file(self, md_path):
         """创建测试 MD 文件"""
-        f = temp_dir / "test.md"
-        f.write_text("# Title\n## Subtitle\n### Section", encoding="utf-8")
-        return f
+        md_path.write_text("# Title\n## Subtitle\n### Section", encoding="utf-8")
+        return md_path
 
     def test_h2l_mode_default(self, temp_dir, sample_md_file):
         """默认 h2l 模式"""
@@ -171,9 +176,9 @@ class TestMarktModuleConfig:
         assert "    - Subtitle" in result
         assert "Section" not in result
 
-    def test_l2h_mode(self, temp_dir):
+    def test_l2h_mode(self, temp_dir, md_path):
         """l2h 列表转标题模式"""
-        f = temp_dir / "list.md"
+        f = md_path
         f.write_text("- Item1\n    - Item2\n        - Item3", encoding="utf-8")
 
         ctx = ModuleContext(root=temp_dir)
@@ -185,9 +190,9 @@ class TestMarktModuleConfig:
         assert "## Item2" in result
         assert "### Item3" in result
 
-    def test_l2h_mode_start_level(self, temp_dir):
+    def test_l2h_mode_start_level(self, temp_dir, md_path):
         """l2h 起始级别"""
-        f = temp_dir / "list.md"
+        f = md_path
         f.write_text("- A\n    - B", encoding="utf-8")
 
         ctx = ModuleContext(root=temp_dir)
@@ -198,9 +203,9 @@ class TestMarktModuleConfig:
         assert "## A" in result
         assert "### B" in result
 
-    def test_l2h_mode_max_level(self, temp_dir):
+    def test_l2h_mode_max_level(self, temp_dir, md_path):
         """l2h 最大级别限制"""
-        f = temp_dir / "list.md"
+        f = md_path
         f.write_text("- A\n    - B\n        - C", encoding="utf-8")
 
         ctx = ModuleContext(root=temp_dir)
@@ -0,0 +1,19 @@
+"""单行有序列表处理测试 - 脚本与核心模块的孤立判定一致"""
+import pytest
+
+from marku.core.single_orderlist import _process
+from marku.scripts.single_orderlist_remover import process_ordered_lists
+
+
+@pytest.mark.parametrize("content, expected", [
+    ("1. a", "1.a"),
+    ("1. a\n2. b", "1. a\n2. b"),
+    # 间隔 3 行仍视为相邻，间隔 4 行才算孤立
+    ("1. a\nx\ny\n2. b", "1. a\nx\ny\n2. b"),
+    ("1. a\nx\ny\nz\n2. b", "1.a\nx\ny\nz\n2.b"),
+    ("1. a\nx\ny\nz\n2. b\n3. c", "1.a\nx\ny\nz\n2. b\n3. c"),
+    ("text\n  10. item\n", "text\n  10.item\n"),
+])
+def test_isolated_items(content, expected):
+    assert process_ordered_lists(content, verbose=False) == expected
+    assert _process(content) == expected
@@ -0,0 +1,43 @@
+"""t2list 脚本测试 - 验证逐行扫描器与正则语义一致"""
+import re
+
+import pytest
+
+from marku.scripts.t2list import _is_list_item, _match_heading
+
+
+@pytest.mark.parametrize("line", [
+    "# 标题",
+    "###### 六级",
+    "####### 七级",
+    "#标题",
+    "#",
+    "# ",
+    "#  ",
+    "#\t\t",
+    "##   多个空格  ",
+    "#　全角空白",
+    "- item",
+    "* item",
+    "-item",
+    "-  ",
+    "    - 缩进",
+    "12. item",
+    "12.item",
+    "1 2. item",
+    "٣. 阿拉伯数字",
+    ".  ",
+    "",
+    "   ",
+    "普通段落",
+])
+def test_scanners_match_regex(line):
+    # 语义参照：标题行与列表行的合并模式，标题分支优先，匹配时 level/title 分组有值；否则为列表行
+    line_re = re.compile(r'(?P<level>#{1,6})\s+(?P<title>.+)$|\s*(?:\d+\.|\*|\-)\s+.+$')
+    match = line_re.match(line)
+    heading = _match_heading(line)
+    if match is not None and match.group('level'):
+        assert heading == (len(match.group('level')), match.group('title'))
+    else:
+        assert heading is None
+        assert _is_list_item(line) == (match is not None)
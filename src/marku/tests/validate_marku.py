@@ -96,8 +96,8 @@ def validate_registry():
         "title_convert"
     ]
 
-    registered = list(REGISTRY.keys())
-    print(f"注册的模块: {registered}")
+    registered = set(REGISTRY.keys())
+    print(f"注册的模块: {sorted(registered)}")
 
     missing = [m for m in expected_modules if m not in registered]
     if missing:
@@ -147,15 +147,12 @@ def validate_pipeline_execution():
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
 
-            # 写入配置
-            config_file = temp_path / "test_config.toml"
-            config_file.write_text(config_content, encoding='utf-8')
-
             # 写入输入文件
             input_file = temp_path / "test_input.md"
             input_file.write_text(input_content, encoding='utf-8')
 
-            # 更新配置中的输入路径
+            # 配置中的输入路径替换为实际路径后一次写入
+            config_file = temp_path / "test_config.toml"
             config_content = config_content.replace('./test_input.md', str(input_file).replace('\\', '/'))
             config_file.write_text(config_content, encoding='utf-8')
 